@@ -1,18 +1,20 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Security, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 import logging
 
 from app.core.security import (
-    get_password_hash,
-    verificar_password,
+    aget_password_hash,
+    averificar_y_actualizar_password,
     crear_token_acceso,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    get_dummy_password_hash
 )
 from app.schemas.auth import UserRegister, UserResponse, Token
+from app.utils.responses import from_db
 from app.models.usuario import Usuario
 from app.db.session import get_db
+from app.core.auth import auth_dependency
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -36,45 +38,39 @@ async def register_user(
     Raises:
         HTTPException: Si el email o username ya están registrados
     """
-    try:
-        # Verificar email duplicado
-        if db.query(Usuario).filter(Usuario.email == user_in.email).first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Este email ya está registrado"
-            )
-        
-        # Verificar username duplicado
-        if db.query(Usuario).filter(Usuario.username == user_in.username).first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Este nombre de usuario ya está registrado"
-            )
+    # Verificar email y username duplicados en una sola consulta con dos EXISTS,
+    # sin traer filas ni hidratar objetos ORM
+    email_existe, username_existe = db.execute(
+        select(
+            exists().where(func.lower(Usuario.email) == user_in.email),
+            exists().where(Usuario.username == user_in.username)
+        )
+    ).one()
 
-        # Crear nuevo usuario
-        db_user = Usuario(
-            email=user_in.email,
-            username=user_in.username,
-            password=get_password_hash(user_in.password),
-            rol=user_in.rol
+    if email_existe:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Este email ya está registrado"
         )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        
-        return db_user
-        
-    except HTTPException:
-        db.rollback()
-        raise
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error al registrar usuario: {str(e)}")
+
+    if username_existe:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error interno del servidor"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Este nombre de usuario ya está registrado"
         )
 
+    # Crear nuevo usuario
+    db_user = Usuario(
+        email=user_in.email,
+        username=user_in.username,
+        password=await aget_password_hash(user_in.password),
+        rol=user_in.rol
+    )
+    db.add(db_user)
+    db.commit()
+    
+    return from_db(UserResponse, db_user)
+
 @router.post("/login", response_model=Token)
 async def login_access_token(
     db: Session = Depends(get_db),
@@ -93,47 +89,53 @@ async def login_access_token(
     Raises:
         HTTPException: Si las credenciales son inválidas o el usuario está inactivo
     """
-    try:
-        # Buscar usuario por email o username
-        user = None
-        if "@" in form_data.username:
-            user = db.query(Usuario).filter(Usuario.email == form_data.username).first()
-        else:
-            user = db.query(Usuario).filter(Usuario.username == form_data.username).first()
-
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Credenciales incorrectas",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    # Buscar usuario por email o username
+    user = None
+    if "@" in form_data.username:
+        user = db.query(Usuario).filter(
+            func.lower(Usuario.email) == form_data.username.lower()
+        ).first()
+    else:
+        user = db.query(Usuario).filter(Usuario.username == form_data.username).first()
 
-        if not verificar_password(form_data.password, user.password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Credenciales incorrectas",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    # Verificar siempre contra un hash para que el tiempo de respuesta
+    # sea el mismo exista o no el usuario
+    password_valido, nuevo_hash = await averificar_y_actualizar_password(
+        form_data.password, user.password if user else get_dummy_password_hash()
+    )
+    if not user or not password_valido:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciales incorrectas",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
-        if not user.activo:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Usuario inactivo"
-            )
+    # Migrar hashes antiguos (bcrypt o parámetros Argon2 previos) al esquema actual
+    if nuevo_hash:
+        user.password = nuevo_hash
+        db.commit()
 
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = crear_token_acceso(
-            data={"sub": user.username, "rol": user.rol},
-            expires_delta=access_token_expires
+    if not user.activo:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario inactivo"
         )
 
-        return Token(access_token=access_token, token_type="bearer")
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error en login: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error interno del servidor"
-        )
\ No newline at end of file
+    access_token = crear_token_acceso(data={"sub": user.username, "rol": user.rol})
+
+    return Token(access_token=access_token, token_type="bearer")
+
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(
+    current_user: Usuario = Security(auth_dependency.get_current_user, scopes=["usuario"])
+) -> Usuario:
+    """
+    Retorna la información del usuario autenticado.
+
+    Args:
+        current_user: Usuario obtenido a partir del token JWT
+
+    Returns:
+        UserResponse: Datos del usuario actual
+    """
+    return from_db(UserResponse, current_user)
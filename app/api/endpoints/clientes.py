@@ -1,16 +1,53 @@
+import re
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import exists, func, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.schemas.cliente import Cliente, ClienteCreate, ClienteUpdate
+from app.schemas.cliente import Cliente, ClienteCreate, ClienteCreateList, ClienteUpdate
 from app.models.cliente import Cliente as ClienteModel
 from app.db.session import get_db
+from app.utils.responses import from_db, stream_json_rows
 from app.core.auth import require_usuario  # Para autenticación si es necesaria
 
+# Columnas del esquema Cliente, compartidas por el listado y la creación masiva
+_CLIENTE_COLUMNS = (
+    ClienteModel.id,
+    ClienteModel.nombre,
+    ClienteModel.email,
+    ClienteModel.telefono,
+    ClienteModel.fecha_registro,
+    ClienteModel.activo,
+)
+
+# Índices únicos que una creación masiva viola con un email repetido o ya
+# registrado; cualquier otra restricción es un error del servidor
+_EMAIL_UNIQUE_INDEXES = frozenset(("ix_clientes_email_lower", "ix_clientes_email"))
+_EMAIL_UNIQUE_INDEXES_RE = re.compile(r"\b(?:%s)\b" % "|".join(_EMAIL_UNIQUE_INDEXES))
+
+def _is_email_violation(error: IntegrityError) -> bool:
+    """
+    Indica si la violación de integridad corresponde a un índice único de email.
+
+    psycopg2 expone el nombre de la restricción en diag; con otros drivers
+    (SQLite en los tests, por ejemplo) se busca el nombre del índice en el mensaje.
+
+    Args:
+        error (IntegrityError): Error lanzado por la base de datos
+
+    Returns:
+        bool: True si se violó uno de los índices únicos de email
+    """
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint is not None:
+        return constraint in _EMAIL_UNIQUE_INDEXES
+    return _EMAIL_UNIQUE_INDEXES_RE.search(str(error.orig)) is not None
+
 router = APIRouter()
 
 @router.post("/", response_model=Cliente)
-async def create_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
+def create_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
     """
     Crea un nuevo cliente en la base de datos.
 
@@ -25,19 +62,50 @@ async def create_cliente(cliente: ClienteCreate, db: Session = Depends(get_db)):
         HTTPException: Si ya existe un cliente con el mismo email
     """
     # Verificar si ya existe un cliente con el mismo email
-    if db.query(ClienteModel).filter(ClienteModel.email == cliente.email).first():
+    if db.execute(select(exists().where(func.lower(ClienteModel.email) == cliente.email))).scalar():
         raise HTTPException(status_code=400, detail="Este email ya está registrado")
     
     db_cliente = ClienteModel(**cliente.dict())
     db.add(db_cliente)
     db.commit()
-    db.refresh(db_cliente)
-    return db_cliente
+    return from_db(Cliente, db_cliente)
+
+@router.post("/bulk/", response_model=List[Cliente])
+def create_clientes_bulk(clientes: List[ClienteCreate], db: Session = Depends(get_db)):
+    """
+    Crea varios clientes en una sola sentencia INSERT con executemany.
+
+    Args:
+        clientes (List[ClienteCreate]): Datos de los clientes a crear
+        db (Session): Sesión de la base de datos
+
+    Returns:
+        List[Cliente]: Los clientes creados, en el mismo orden recibido
+
+    Raises:
+        HTTPException: Si algún email está repetido o ya está registrado
+    """
+    if not clientes:
+        return []
+    # El índice único sobre lower(email) detecta los duplicados sin consultas previas por fila
+    try:
+        creados = db.execute(
+            insert(ClienteModel).returning(*_CLIENTE_COLUMNS, sort_by_parameter_order=True),
+            ClienteCreateList.dump_python(clientes)
+        ).mappings().all()
+        db.commit()
+    except IntegrityError as e:
+        # get_db revierte la transacción al propagarse cualquiera de las excepciones
+        if not _is_email_violation(e):
+            raise
+        raise HTTPException(status_code=400, detail="Uno o más emails ya están registrados")
+    return stream_json_rows(creados)
 
 @router.get("/", response_model=List[Cliente])
-async def read_clientes(
+def read_clientes(
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
@@ -46,16 +114,34 @@ async def read_clientes(
     Args:
         skip (int): Número de registros a omitir (para paginación)
         limit (int): Número máximo de registros a devolver
+        after_id (Optional[int]): Cursor de paginación; si se indica, devuelve
+            los registros con ID mayor a este en lugar de usar skip
         db (Session): Sesión de la base de datos
 
     Returns:
         List[Cliente]: Lista de clientes encontrados
     """
-    clientes = db.query(ClienteModel).offset(skip).limit(limit).all()
-    return clientes
+    # Seleccionar solo las columnas del esquema evita hidratar objetos ORM
+    stmt = (
+        select(*_CLIENTE_COLUMNS)
+        .order_by(ClienteModel.id)
+        .limit(limit)
+    )
+    # Paginación por cursor (keyset): usa el índice de la PK sin recorrer
+    # las filas omitidas, a diferencia de OFFSET
+    if after_id is not None:
+        stmt = stmt.where(ClienteModel.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+
+    clientes = db.execute(stmt).mappings().all()
+    headers = {}
+    if len(clientes) == limit:
+        headers["X-Next-Cursor"] = str(clientes[-1]["id"])
+    return stream_json_rows(clientes, headers)
 
 @router.get("/{cliente_id}", response_model=Cliente)
-async def read_cliente(cliente_id: int, db: Session = Depends(get_db)):
+def read_cliente(cliente_id: int, db: Session = Depends(get_db)):
     """
     Recupera un cliente específico por su ID.
 
@@ -69,13 +155,13 @@ async def read_cliente(cliente_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si el cliente no existe
     """
-    db_cliente = db.query(ClienteModel).filter(ClienteModel.id == cliente_id).first()
+    db_cliente = db.get(ClienteModel, cliente_id)
     if db_cliente is None:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
-    return db_cliente
+    return from_db(Cliente, db_cliente)
 
 @router.put("/{cliente_id}", response_model=Cliente)
-async def update_cliente(
+def update_cliente(
     cliente_id: int,
     cliente: ClienteUpdate,
     db: Session = Depends(get_db)
@@ -94,24 +180,27 @@ async def update_cliente(
     Raises:
         HTTPException: Si el cliente no existe o si hay conflicto con el email
     """
-    db_cliente = db.query(ClienteModel).filter(ClienteModel.id == cliente_id).first()
+    db_cliente = db.get(ClienteModel, cliente_id)
     if db_cliente is None:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
 
-    # Si se está actualizando el email, verificar que no exista
+    # Si se está actualizando el email, verificar que no lo use otro cliente; el
+    # esquema ya lo normalizó y un cambio solo de mayúsculas no es un conflicto
     if cliente.email and cliente.email != db_cliente.email:
-        if db.query(ClienteModel).filter(ClienteModel.email == cliente.email).first():
+        if db.execute(select(exists().where(
+            func.lower(ClienteModel.email) == cliente.email,
+            ClienteModel.id != cliente_id
+        ))).scalar():
             raise HTTPException(status_code=400, detail="Este email ya está registrado")
 
     for key, value in cliente.dict(exclude_unset=True).items():
         setattr(db_cliente, key, value)
 
     db.commit()
-    db.refresh(db_cliente)
-    return db_cliente
+    return from_db(Cliente, db_cliente)
 
 @router.delete("/{cliente_id}", response_model=Cliente)
-async def delete_cliente(cliente_id: int, db: Session = Depends(get_db)):
+def delete_cliente(cliente_id: int, db: Session = Depends(get_db)):
     """
     Elimina un cliente.
 
@@ -125,10 +214,10 @@ async def delete_cliente(cliente_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si el cliente no existe
     """
-    db_cliente = db.query(ClienteModel).filter(ClienteModel.id == cliente_id).first()
+    db_cliente = db.get(ClienteModel, cliente_id)
     if db_cliente is None:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
     db.delete(db_cliente)
     db.commit()
-    return db_cliente
\ No newline at end of file
+    return from_db(Cliente, db_cliente)
\ No newline at end of file
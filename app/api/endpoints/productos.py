@@ -1,10 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.schemas.producto import Producto, ProductoCreate, ProductoUpdate #-- Se agregó app. a la ruta
+from app.schemas.producto import Producto, ProductoCreate, ProductoCreateList, ProductoUpdate #-- Se agregó app. a la ruta
 from app.models.producto import Producto as ProductoModel #-- Se agregó app. a la ruta
 from app.db.session import get_db #-- Se agregó app. a la ruta
+from app.utils.responses import from_db, stream_json_rows
+
+# Columnas del esquema Producto, compartidas por el listado y la creación masiva
+_PRODUCTO_COLUMNS = (
+    ProductoModel.id,
+    ProductoModel.nombre,
+    ProductoModel.descripcion,
+    ProductoModel.precio,
+    ProductoModel.stock,
+    ProductoModel.categoria,
+    ProductoModel.fecha_creacion,
+    ProductoModel.ventas_ultimo_mes,
+    ProductoModel.baja_rotacion,
+)
 
 router = APIRouter()
 
@@ -26,24 +41,68 @@ def create_producto(producto: ProductoCreate, db: Session = Depends(get_db)):
     db_producto = ProductoModel(**producto.dict())
     db.add(db_producto)
     db.commit()
-    db.refresh(db_producto)
-    return db_producto
+    return from_db(Producto, db_producto)
+
+@router.post("/bulk/", response_model=List[Producto])
+def create_productos_bulk(productos: List[ProductoCreate], db: Session = Depends(get_db)):
+    """
+    Crea varios productos en una sola sentencia INSERT con executemany.
+
+    Args:
+        productos (List[ProductoCreate]): Datos de los productos a crear.
+        db (Session): Sesión de la get_db de datos.
+
+    Returns:
+        List[Producto]: Los productos creados, en el mismo orden recibido.
+    """
+    if not productos:
+        return []
+    # Un solo INSERT ... RETURNING por lote, sin pasar por el identity map
+    creados = db.execute(
+        insert(ProductoModel).returning(*_PRODUCTO_COLUMNS, sort_by_parameter_order=True),
+        ProductoCreateList.dump_python(productos)
+    ).mappings().all()
+    db.commit()
+    return stream_json_rows(creados)
 
 @router.get("/", response_model=List[Producto])
-def read_productos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_productos(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
     """
     Recupera una lista de productos de la get_db de datos.
 
     Args:
         skip (int): Número de registros a omitir (para paginación).
         limit (int): Número máximo de registros a devolver.
+        after_id (Optional[int]): Cursor de paginación; si se indica, devuelve
+            los registros con ID mayor a este en lugar de usar skip.
         db (Session): Sesión de la get_db de datos.
 
     Returns:
         List[Producto]: Lista de productos recuperados.
     """
-    productos = db.query(ProductoModel).offset(skip).limit(limit).all()
-    return productos
+    # Seleccionar solo las columnas del esquema evita hidratar objetos ORM
+    stmt = (
+        select(*_PRODUCTO_COLUMNS)
+        .order_by(ProductoModel.id)
+        .limit(limit)
+    )
+    # Paginación por cursor (keyset): usa el índice de la PK sin recorrer
+    # las filas omitidas, a diferencia de OFFSET
+    if after_id is not None:
+        stmt = stmt.where(ProductoModel.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+
+    productos = db.execute(stmt).mappings().all()
+    headers = {}
+    if len(productos) == limit:
+        headers["X-Next-Cursor"] = str(productos[-1]["id"])
+    return stream_json_rows(productos, headers)
 
 @router.get("/{producto_id}", response_model=Producto)
 def read_producto(producto_id: int, db: Session = Depends(get_db)):
@@ -60,10 +119,10 @@ def read_producto(producto_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si el producto no se encuentra.
     """
-    db_producto = db.query(ProductoModel).filter(ProductoModel.id == producto_id).first()
+    db_producto = db.get(ProductoModel, producto_id)
     if db_producto is None:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return db_producto
+    return from_db(Producto, db_producto)
 
 @router.put("/{producto_id}", response_model=Producto)
 def update_producto(producto_id: int, producto: ProductoUpdate, db: Session = Depends(get_db)):
@@ -81,14 +140,13 @@ def update_producto(producto_id: int, producto: ProductoUpdate, db: Session = De
     Raises:
         HTTPException: Si el producto no se encuentra.
     """
-    db_producto = db.query(ProductoModel).filter(ProductoModel.id == producto_id).first()
+    db_producto = db.get(ProductoModel, producto_id)
     if db_producto is None:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     for key, value in producto.dict(exclude_unset=True).items():
         setattr(db_producto, key, value)
     db.commit()
-    db.refresh(db_producto)
-    return db_producto
+    return from_db(Producto, db_producto)
 
 @router.delete("/{producto_id}", response_model=Producto)
 def delete_producto(producto_id: int, db: Session = Depends(get_db)):
@@ -105,9 +163,9 @@ def delete_producto(producto_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si el producto no se encuentra.
     """
-    db_producto = db.query(ProductoModel).filter(ProductoModel.id == producto_id).first()
+    db_producto = db.get(ProductoModel, producto_id)
     if db_producto is None:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     db.delete(db_producto)
     db.commit()
-    return db_producto
\ No newline at end of file
+    return from_db(Producto, db_producto)
\ No newline at end of file
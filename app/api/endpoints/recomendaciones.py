@@ -13,17 +13,29 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def get_recomendacion_service(db: Session = Depends(get_db)) -> RecomendacionService:
+    """
+    Dependencia que provee el servicio de recomendaciones ligado a la sesión de la petición.
+
+    Args:
+        db (Session): Sesión de base de datos
+
+    Returns:
+        RecomendacionService: Servicio de recomendaciones
+    """
+    return RecomendacionService(db)
+
 @router.post("/", response_model=List[dict])
-async def obtener_recomendaciones(
+def obtener_recomendaciones(
     request: RecomendacionRequest,
-    db: Session = Depends(get_db)
+    servicio_recomendacion: RecomendacionService = Depends(get_recomendacion_service)
 ):
     """
     Obtiene recomendaciones de productos para un cliente específico.
 
     Args:
         request (RecomendacionRequest): Datos de la solicitud de recomendaciones
-        db (Session): Sesión de base de datos
+        servicio_recomendacion (RecomendacionService): Servicio de recomendaciones
 
     Returns:
         List[dict]: Lista de recomendaciones de productos con sus scores
@@ -32,7 +44,6 @@ async def obtener_recomendaciones(
         HTTPException: Si ocurre un error al generar las recomendaciones
     """
     try:
-        servicio_recomendacion = RecomendacionService(db)
         recomendaciones = servicio_recomendacion.generar_recomendaciones(
             cliente_id=request.cliente_id,
             producto_id=request.producto_id,
@@ -42,7 +53,4 @@ async def obtener_recomendaciones(
 
     except ValueError as e:
         logger.error(f"Error al generar recomendaciones: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.error(f"Error interno: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error interno del servidor")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
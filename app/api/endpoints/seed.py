@@ -1,15 +1,116 @@
+import asyncio
+from typing import TYPE_CHECKING
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, insert, select, text
 from sqlalchemy.orm import Session
+from app.core.security import get_password_hash
+from app.db.base import engine, SessionLocal
 from app.db.session import get_db
-from scripts.seeder import DataSeeder
+from app.models.usuario import Usuario
+from app.utils.responses import ORJSONResponse
 import logging
 
+if TYPE_CHECKING:
+    from scripts.seeder import DataSeeder
+
 router = APIRouter(tags=["seeding"])
 logger = logging.getLogger(__name__)
 
-is_seeding = False
+# Lock local del proceso; el advisory lock de PostgreSQL lo extiende a todos los workers
+_seed_lock = asyncio.Lock()
+SEED_ADVISORY_LOCK_ID = 42
+_TRY_ADVISORY_LOCK_STMT = text("SELECT pg_try_advisory_lock(:lock_id)")
+_ADVISORY_UNLOCK_STMT = text("SELECT pg_advisory_unlock(:lock_id)")
+# Un advisory lock de clave bigint aparece con classid = 32 bits altos,
+# objid = 32 bits bajos y objsubid = 1 (las claves de dos int4 usan objsubid = 2)
+_ADVISORY_LOCK_HELD_STMT = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+    "AND classid = 0 AND objid = :lock_id AND objsubid = 1)"
+)
+# Sentencia construida una sola vez; SQLAlchemy reutiliza su compilación en caché
+_HAS_DATA_STMT = select(exists().where(Usuario.id.isnot(None)))
+
+# Contraseña común de los usuarios generados por el seeding
+SEED_USER_PASSWORD = "password123"
+
+def _seed_usuarios(seeder: "DataSeeder", num_usuarios: int) -> None:
+    """
+    Inserta los usuarios de prueba en un solo INSERT con executemany.
+
+    El hash de la contraseña se calcula una sola vez y se reutiliza en todas
+    las filas: el seeding no es crítico para la seguridad y cada hash Argon2
+    cuesta decenas de milisegundos.
+
+    Args:
+        seeder (DataSeeder): Seeder que genera los datos ficticios
+        num_usuarios (int): Número de usuarios a crear
+    """
+    if num_usuarios <= 0:
+        return
+    password_hash = get_password_hash(SEED_USER_PASSWORD)
+    usuarios = [seeder.generate_usuario_data(password_hash) for _ in range(num_usuarios)]
+    with SessionLocal() as db:
+        db.execute(insert(Usuario), usuarios)
+        db.commit()
+    logger.info(f"Usuarios creados: {num_usuarios}")
+
+def _try_acquire_advisory_lock():
+    """
+    Intenta tomar el advisory lock de seeding en una conexión dedicada.
+
+    El lock de PostgreSQL pertenece a la sesión, por lo que la conexión debe
+    mantenerse abierta mientras dure el seeding.
+
+    Returns:
+        Connection | None: Conexión que mantiene el lock, o None si otro worker lo tiene
+    """
+    connection = engine.connect()
+    try:
+        if connection.execute(_TRY_ADVISORY_LOCK_STMT, {"lock_id": SEED_ADVISORY_LOCK_ID}).scalar():
+            return connection
+    except Exception:
+        connection.close()
+        raise
+    connection.close()
+    return None
+
+def _release_advisory_lock(connection) -> None:
+    """Libera el advisory lock de seeding y cierra su conexión."""
+    try:
+        connection.execute(_ADVISORY_UNLOCK_STMT, {"lock_id": SEED_ADVISORY_LOCK_ID})
+    except Exception:
+        # Descartar la conexión en lugar de devolverla al pool: al cerrarse la
+        # sesión, PostgreSQL libera el lock que no se pudo liberar aquí
+        connection.invalidate()
+        raise
+    finally:
+        connection.close()
+
+async def _release_seed_locks(lock_connection) -> None:
+    """
+    Libera el advisory lock (si se tomó) y el lock local del proceso.
+
+    Debe llamarse exactamente una vez por adquisición de _seed_lock. Un fallo al
+    liberar el advisory lock se registra pero no impide liberar el lock local,
+    que de otro modo bloquearía el seeding hasta reiniciar el proceso.
+
+    Args:
+        lock_connection (Connection | None): Conexión que mantiene el advisory lock
+    """
+    try:
+        if lock_connection is not None:
+            await run_in_threadpool(_release_advisory_lock, lock_connection)
+    except Exception as e:
+        logger.error(f"Error liberando el advisory lock de seeding: {str(e)}")
+    finally:
+        _seed_lock.release()
+
+def _has_data(db: Session) -> bool:
+    """Indica si la base de datos ya contiene usuarios."""
+    return bool(db.execute(_HAS_DATA_STMT).scalar())
 
-@router.post("/")
+@router.post("/", response_class=ORJSONResponse)
 async def seed_database(
     background_tasks: BackgroundTasks,
     force: bool = False,
@@ -20,7 +121,7 @@ async def seed_database(
 ):
     """
     Endpoint para poblar la base de datos con datos de prueba.
-    
+
     Args:
         background_tasks: Tareas en segundo plano
         force: Si es True, permite repoblar incluso si ya hay datos
@@ -29,35 +130,45 @@ async def seed_database(
         num_clientes: Número de clientes a crear
         db: Sesión de base de datos
     """
-    global is_seeding
-    
+    if _seed_lock.locked():
+        return {"message": "Ya hay un proceso de seeding en ejecución"}
+
+    # Sin await entre la comprobación y la adquisición: no hay carrera en el event loop
+    await _seed_lock.acquire()
+    lock_connection = None
+    seeding_iniciado = False
     try:
-        if is_seeding:
+        # Las llamadas a la base de datos son bloqueantes: se ejecutan en el
+        # threadpool para no detener el event loop si el pool está saturado
+        lock_connection = await run_in_threadpool(_try_acquire_advisory_lock)
+        if lock_connection is None:
             return {"message": "Ya hay un proceso de seeding en ejecución"}
 
-        if not force:
-            has_data = db.execute("SELECT 1 FROM usuarios LIMIT 1").scalar()
-            if has_data:
-                return {"message": "La base de datos ya contiene datos. Usa force=true para sobrescribir"}
+        if not force and await run_in_threadpool(_has_data, db):
+            return {"message": "La base de datos ya contiene datos. Usa force=true para sobrescribir"}
 
         async def seed_task():
-            global is_seeding
             try:
-                is_seeding = True
-                seeder = DataSeeder()
-                await seeder.seed_data(
-                    num_usuarios=num_usuarios,
-                    num_productos=num_productos,
-                    num_clientes=num_clientes
-                )
+                # Faker y httpx solo se cargan cuando se ejecuta un seeding
+                from scripts.seeder import DataSeeder
+                async with DataSeeder() as seeder:
+                    await seeder.seed_data(
+                        num_usuarios=num_usuarios,
+                        num_productos=num_productos,
+                        num_clientes=num_clientes
+                    )
+                # Hashing e inserción son bloqueantes; se ejecutan fuera del event loop
+                await run_in_threadpool(_seed_usuarios, seeder, num_usuarios)
                 logger.info("Seeding completado exitosamente")
             except Exception as e:
                 logger.error(f"Error durante el seeding: {str(e)}")
             finally:
-                is_seeding = False
+                await _release_seed_locks(lock_connection)
 
         background_tasks.add_task(seed_task)
-        
+        # Desde aquí los locks son de la tarea en segundo plano, que los libera al terminar
+        seeding_iniciado = True
+
         return {
             "message": "Proceso de seeding iniciado",
             "configuracion": {
@@ -66,12 +177,23 @@ async def seed_database(
                 "clientes": num_clientes
             }
         }
-        
+
     except Exception as e:
         logger.error(f"Error iniciando seeding: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not seeding_iniciado:
+            await _release_seed_locks(lock_connection)
+
+@router.get("/status", response_class=ORJSONResponse)
+def get_seed_status(db: Session = Depends(get_db)):
+    """
+    Retorna el estado actual del proceso de seeding en cualquier worker.
 
-@router.get("/status")
-async def get_seed_status():
-    """Retorna el estado actual del proceso de seeding."""
-    return {"is_running": is_seeding}
\ No newline at end of file
+    Es def y no async def: la consulta a pg_locks es bloqueante y FastAPI
+    ejecuta el endpoint en el threadpool.
+    """
+    if _seed_lock.locked():
+        return {"is_running": True}
+    is_running = db.execute(_ADVISORY_LOCK_HELD_STMT, {"lock_id": SEED_ADVISORY_LOCK_ID}).scalar()
+    return {"is_running": bool(is_running)}
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.schemas.usuario import Usuario, UsuarioCreate, UsuarioUpdate #-- Se agregó app. a la ruta
 from app.models.usuario import Usuario as UsuarioModel #-- Se agregó app. a la ruta
 from app.db.session import get_db #-- Se agregó app. a la ruta
+from app.utils.responses import from_db, stream_json_rows
+from app.core.auth import invalidate_cached_user
 
 router = APIRouter()
 
@@ -26,24 +29,54 @@ def create_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
     db_usuario = UsuarioModel(**usuario.dict())
     db.add(db_usuario)
     db.commit()
-    db.refresh(db_usuario)
-    return db_usuario
+    return from_db(Usuario, db_usuario)
 
 @router.get("/", response_model=List[Usuario])
-def read_usuarios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_usuarios(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
     """
     Recupera una lista de usuarios de la get_db de datos.
 
     Args:
         skip (int): Número de registros a omitir (para paginación).
         limit (int): Número máximo de registros a devolver.
+        after_id (Optional[int]): Cursor de paginación; si se indica, devuelve
+            los registros con ID mayor a este en lugar de usar skip.
         db (Session): Sesión de la get_db de datos.
 
     Returns:
         List[Usuario]: Lista de usuarios recuperados.
     """
-    usuarios = db.query(UsuarioModel).offset(skip).limit(limit).all()
-    return usuarios
+    # Seleccionar solo las columnas del esquema evita hidratar objetos ORM
+    # y no trae el hash de la contraseña
+    stmt = (
+        select(
+            UsuarioModel.id,
+            UsuarioModel.username,
+            UsuarioModel.email,
+            UsuarioModel.rol,
+            UsuarioModel.fecha_registro,
+            UsuarioModel.activo
+        )
+        .order_by(UsuarioModel.id)
+        .limit(limit)
+    )
+    # Paginación por cursor (keyset): usa el índice de la PK sin recorrer
+    # las filas omitidas, a diferencia de OFFSET
+    if after_id is not None:
+        stmt = stmt.where(UsuarioModel.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+
+    usuarios = db.execute(stmt).mappings().all()
+    headers = {}
+    if len(usuarios) == limit:
+        headers["X-Next-Cursor"] = str(usuarios[-1]["id"])
+    return stream_json_rows(usuarios, headers)
 
 @router.get("/{usuario_id}", response_model=Usuario)
 def read_usuario(usuario_id: int, db: Session = Depends(get_db)):
@@ -60,10 +93,10 @@ def read_usuario(usuario_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si el usuario no se encuentra.
     """
-    db_usuario = db.query(UsuarioModel).filter(UsuarioModel.id == usuario_id).first()
+    db_usuario = db.get(UsuarioModel, usuario_id)
     if db_usuario is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return db_usuario
+    return from_db(Usuario, db_usuario)
 
 @router.put("/{usuario_id}", response_model=Usuario)
 def update_usuario(usuario_id: int, usuario: UsuarioUpdate, db: Session = Depends(get_db)):
@@ -81,14 +114,19 @@ def update_usuario(usuario_id: int, usuario: UsuarioUpdate, db: Session = Depend
     Raises:
         HTTPException: Si el usuario no se encuentra.
     """
-    db_usuario = db.query(UsuarioModel).filter(UsuarioModel.id == usuario_id).first()
+    db_usuario = db.get(UsuarioModel, usuario_id)
     if db_usuario is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    username_anterior = db_usuario.username
     for key, value in usuario.dict(exclude_unset=True).items():
         setattr(db_usuario, key, value)
     db.commit()
-    db.refresh(db_usuario)
-    return db_usuario
+    # Invalidar tras el commit: antes, una petición concurrente podría volver a
+    # cachear la fila anterior (con el rol o el estado ya modificados)
+    invalidate_cached_user(username_anterior)
+    if db_usuario.username != username_anterior:
+        invalidate_cached_user(db_usuario.username)
+    return from_db(Usuario, db_usuario)
 
 @router.delete("/{usuario_id}", response_model=Usuario)
 def delete_usuario(usuario_id: int, db: Session = Depends(get_db)):
@@ -105,9 +143,10 @@ def delete_usuario(usuario_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si el usuario no se encuentra.
     """
-    db_usuario = db.query(UsuarioModel).filter(UsuarioModel.id == usuario_id).first()
+    db_usuario = db.get(UsuarioModel, usuario_id)
     if db_usuario is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     db.delete(db_usuario)
     db.commit()
-    return db_usuario
\ No newline at end of file
+    invalidate_cached_user(db_usuario.username)
+    return from_db(Usuario, db_usuario)
\ No newline at end of file
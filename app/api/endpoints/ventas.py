@@ -1,8 +1,8 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import Select, exists, insert, select, tuple_, update
+from sqlalchemy.orm import Session, raiseload
+from typing import List, Optional
 
 from app.schemas.venta import Venta, VentaCreate
 from app.models.venta import Venta as VentaModel
@@ -10,18 +10,194 @@ from app.models.detalle_venta import DetalleVenta as DetalleVentaModel
 from app.models.producto import Producto as ProductoModel
 from app.models.cliente import Cliente as ClienteModel
 from app.db.session import get_db
+from app.core.config import settings
 from app.core.auth import require_vendedor
+from app.services.recomendacion.sistema_recomendaciones import invalidate_recommendation_cache
 import logging
 
-# Configuración de logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columnas del esquema Venta. Los listados las seleccionan como filas: al no
+# haber objetos ORM, serializar la respuesta no puede disparar cargas perezosas
+# de cliente o detalles_venta (N+1)
+_VENTA_COLUMNS = (
+    VentaModel.id,
+    VentaModel.cliente_id,
+    VentaModel.fecha_venta,
+    VentaModel.total,
+    VentaModel.estado,
+)
+
 router = APIRouter()
 
+def _venta_load_options() -> tuple:
+    """
+    Opciones de carga para las consultas ORM de ventas.
+
+    En modo DEBUG se añade raiseload("*"): cualquier relación no cargada
+    explícitamente lanza un error en lugar de disparar un SELECT por fila,
+    de modo que un N+1 nuevo aparece en los tests y no en producción.
+
+    Returns:
+        tuple: Opciones para Query.options()
+    """
+    return (raiseload("*"),) if settings.DEBUG else ()
+
+def _paginar_ventas(
+    stmt: Select,
+    skip: int,
+    limit: int,
+    cursor_fecha: Optional[datetime],
+    cursor_id: Optional[int]
+) -> Select:
+    """
+    Aplica el orden (fecha_venta DESC, id DESC) y la paginación a un listado de ventas.
+
+    Con cursor (keyset) la consulta recorre el índice desde la última venta vista,
+    con costo constante por página; sin cursor se mantiene OFFSET por compatibilidad.
+
+    Args:
+        stmt (Select): Consulta base del listado
+        skip (int): Número de registros a omitir si no se usa cursor
+        limit (int): Número máximo de registros a devolver
+        cursor_fecha (Optional[datetime]): fecha_venta de la última venta de la página anterior
+        cursor_id (Optional[int]): ID de la última venta de la página anterior
+
+    Returns:
+        Select: Consulta ordenada y paginada
+
+    Raises:
+        HTTPException: Si solo se indica una de las dos partes del cursor
+    """
+    stmt = stmt.order_by(VentaModel.fecha_venta.desc(), VentaModel.id.desc()).limit(limit)
+    if cursor_fecha is None and cursor_id is None:
+        return stmt.offset(skip)
+    if cursor_fecha is None or cursor_id is None:
+        raise HTTPException(status_code=400, detail="El cursor requiere cursor_fecha y cursor_id")
+    return stmt.where(tuple_(VentaModel.fecha_venta, VentaModel.id) < tuple_(cursor_fecha, cursor_id))
+
+def _set_next_cursor(response: Response, ventas: List, limit: int) -> None:
+    """
+    Publica en las cabeceras el cursor de la página siguiente si la actual está completa.
+
+    Args:
+        response (Response): Respuesta del endpoint
+        ventas (List): Filas de la página actual
+        limit (int): Tamaño de página solicitado
+    """
+    if ventas and len(ventas) == limit:
+        ultima = ventas[-1]
+        response.headers["X-Next-Cursor-Fecha"] = ultima["fecha_venta"].isoformat()
+        response.headers["X-Next-Cursor-Id"] = str(ultima["id"])
+
+def _cliente_exists(db: Session, cliente_id: int) -> bool:
+    """
+    Verifica si existe un cliente sin traer su fila completa.
+
+    Args:
+        db (Session): Sesión de la base de datos
+        cliente_id (int): ID del cliente
+
+    Returns:
+        bool: True si el cliente existe
+    """
+    return db.execute(select(exists().where(ClienteModel.id == cliente_id))).scalar()
+
+def _registrar_venta(db: Session, venta: VentaCreate) -> VentaModel:
+    """
+    Inserta la venta y sus detalles y descuenta el stock, sin confirmar la transacción.
+
+    Args:
+        db (Session): Sesión de la base de datos, dentro de una transacción
+        venta (VentaCreate): Datos de la venta a crear, incluyendo detalles
+
+    Returns:
+        VentaModel: La venta creada
+
+    Raises:
+        HTTPException: Si el cliente no existe, si algún producto no existe,
+                      o si no hay suficiente stock
+    """
+    # Verificar que el cliente existe
+    if not _cliente_exists(db, venta.cliente_id):
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+
+    # Crear la venta
+    db_venta = VentaModel(
+        cliente_id=venta.cliente_id,
+        total=venta.total,
+        estado=venta.estado,
+        fecha_venta=datetime.now()  # Siempre usar la fecha actual
+    )
+    db.add(db_venta)
+    db.flush()
+
+    # Cargar todos los productos de la venta en una sola consulta IN. FOR UPDATE
+    # bloquea las filas hasta el commit, de modo que la verificación de stock y
+    # el descuento no compiten con otras ventas; ordenar por ID fija el orden de
+    # bloqueo y evita deadlocks entre ventas concurrentes
+    producto_ids = {detalle.producto_id for detalle in venta.detalles_venta}
+    productos = {
+        producto.id: producto
+        for producto in db.execute(
+            select(
+                ProductoModel.id,
+                ProductoModel.nombre,
+                ProductoModel.stock,
+                ProductoModel.ventas_ultimo_mes
+            )
+            .where(ProductoModel.id.in_(producto_ids))
+            .order_by(ProductoModel.id)
+            .with_for_update()
+        )
+    }
+
+    # Procesar los detalles de la venta; el stock restante se lleva por producto
+    # para que varias líneas del mismo producto se descuenten acumuladas
+    detalles = []
+    actualizaciones = {}
+    for detalle in venta.detalles_venta:
+        # Verificar que el producto existe y hay suficiente stock
+        producto = productos.get(detalle.producto_id)
+        if not producto:
+            raise HTTPException(status_code=404, detail=f"Producto {detalle.producto_id} no encontrado")
+
+        valores = actualizaciones.setdefault(producto.id, {
+            "id": producto.id,
+            "stock": producto.stock,
+            "ventas_ultimo_mes": producto.ventas_ultimo_mes
+        })
+        if valores["stock"] < detalle.cantidad:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Stock insuficiente para el producto {producto.nombre}"
+            )
+
+        # Acumular el detalle de venta para insertarlo junto con los demás
+        detalles.append({
+            "venta_id": db_venta.id,
+            "producto_id": detalle.producto_id,
+            "cantidad": detalle.cantidad,
+            "precio_unitario": detalle.precio_unitario
+        })
+
+        # Actualizar el stock y ventas del producto
+        valores["stock"] -= detalle.cantidad
+        valores["ventas_ultimo_mes"] += detalle.cantidad
+
+    # Un solo INSERT con executemany en lugar de un INSERT por detalle
+    if detalles:
+        db.execute(insert(DetalleVentaModel), detalles)
+        # UPDATE masivo por clave primaria: una sentencia para todos los productos.
+        # Los productos se leyeron como filas, no como objetos ORM, así que no
+        # quedan instancias desactualizadas en la sesión
+        db.execute(update(ProductoModel), list(actualizaciones.values()))
+
+    return db_venta
+
 @router.post("/", response_model=Venta)
 # @require_vendedor
-async def create_venta(venta: VentaCreate, db: Session = Depends(get_db)):
+def create_venta(venta: VentaCreate, db: Session = Depends(get_db)):
     """
     Crea una nueva venta con sus detalles.
 
@@ -36,96 +212,74 @@ async def create_venta(venta: VentaCreate, db: Session = Depends(get_db)):
         HTTPException: Si el cliente no existe, si algún producto no existe,
                       o si no hay suficiente stock
     """
-    try:
-        # Verificar que el cliente existe
-        cliente = db.query(ClienteModel).filter(ClienteModel.id == venta.cliente_id).first()
-        if not cliente:
-            raise HTTPException(status_code=404, detail="Cliente no encontrado")
-
-        # Crear la venta
-        db_venta = VentaModel(
-            cliente_id=venta.cliente_id,
-            total=venta.total,
-            estado=venta.estado,
-            fecha_venta=datetime.now()  # Siempre usar la fecha actual
-        )
-        db.add(db_venta)
-        db.flush()
-
-        # Procesar los detalles de la venta
-        for detalle in venta.detalles_venta:
-            # Verificar que el producto existe y hay suficiente stock
-            producto = db.query(ProductoModel).filter(ProductoModel.id == detalle.producto_id).first()
-            if not producto:
-                db.rollback()
-                raise HTTPException(status_code=404, detail=f"Producto {detalle.producto_id} no encontrado")
-            
-            if producto.stock < detalle.cantidad:
-                db.rollback()
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Stock insuficiente para el producto {producto.nombre}"
-                )
-
-            # Crear el detalle de venta
-            db_detalle = DetalleVentaModel(
-                venta_id=db_venta.id,
-                producto_id=detalle.producto_id,
-                cantidad=detalle.cantidad,
-                precio_unitario=detalle.precio_unitario
-            )
-            db.add(db_detalle)
+    # Toda la venta ocurre en una única transacción: COMMIT al terminar y
+    # ROLLBACK ante cualquier excepción. Se mantiene READ COMMITTED: con FOR UPDATE,
+    # una venta concurrente espera el bloqueo y relee el stock ya confirmado,
+    # mientras que REPEATABLE READ convertiría esa espera en un error de serialización.
+    # Session.begin() falla si la sesión ya inició una transacción (p. ej. si una
+    # dependencia consultó con la misma sesión); en ese caso se confirma a mano
+    if db.in_transaction():
+        try:
+            db_venta = _registrar_venta(db, venta)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    else:
+        with db.begin():
+            db_venta = _registrar_venta(db, venta)
 
-            # Actualizar el stock y ventas del producto
-            producto.stock -= detalle.cantidad
-            producto.ventas_ultimo_mes += detalle.cantidad
-
-        db.commit()
-        db.refresh(db_venta)
-        return db_venta
-
-    except HTTPException:
-        db.rollback()
-        raise
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error creando venta: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Tras el commit, las recomendaciones deben reflejar la nueva venta
+    invalidate_recommendation_cache(venta.cliente_id)
+    return db_venta
 
 @router.get("/", response_model=List[Venta])
-async def read_ventas(
+def read_ventas(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor_fecha: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Recupera una lista de ventas.
+    Recupera una lista de ventas, de la más reciente a la más antigua.
 
     Args:
         skip (int): Número de registros a omitir (para paginación)
         limit (int): Número máximo de registros a devolver
+        cursor_fecha (Optional[datetime]): Cursor de paginación (X-Next-Cursor-Fecha)
+        cursor_id (Optional[int]): Cursor de paginación (X-Next-Cursor-Id)
         db (Session): Sesión de la base de datos
 
     Returns:
         List[Venta]: Lista de ventas encontradas
     """
-    ventas = db.query(VentaModel).offset(skip).limit(limit).all()
+    ventas = db.execute(
+        _paginar_ventas(select(*_VENTA_COLUMNS), skip, limit, cursor_fecha, cursor_id)
+    ).mappings().all()
+    _set_next_cursor(response, ventas, limit)
     return ventas
 
 @router.get("/cliente/{cliente_id}", response_model=List[Venta])
-async def read_ventas_by_cliente(
+def read_ventas_by_cliente(
     cliente_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor_fecha: Optional[datetime] = None,
+    cursor_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Recupera todas las ventas de un cliente específico.
+    Recupera todas las ventas de un cliente específico, de la más reciente a la más antigua.
 
     Args:
         cliente_id (int): ID del cliente
         skip (int): Número de registros a omitir
         limit (int): Número máximo de registros a devolver
+        cursor_fecha (Optional[datetime]): Cursor de paginación (X-Next-Cursor-Fecha)
+        cursor_id (Optional[int]): Cursor de paginación (X-Next-Cursor-Id)
         db (Session): Sesión de la base de datos
 
     Returns:
@@ -134,18 +288,20 @@ async def read_ventas_by_cliente(
     Raises:
         HTTPException: Si el cliente no existe
     """
-    if not db.query(ClienteModel).filter(ClienteModel.id == cliente_id).first():
+    if not _cliente_exists(db, cliente_id):
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    ventas = db.query(VentaModel)\
-        .filter(VentaModel.cliente_id == cliente_id)\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    ventas = db.execute(
+        _paginar_ventas(
+            select(*_VENTA_COLUMNS).where(VentaModel.cliente_id == cliente_id),
+            skip, limit, cursor_fecha, cursor_id
+        )
+    ).mappings().all()
+    _set_next_cursor(response, ventas, limit)
     return ventas
 
 @router.get("/{venta_id}", response_model=Venta)
-async def read_venta(venta_id: int, db: Session = Depends(get_db)):
+def read_venta(venta_id: int, db: Session = Depends(get_db)):
     """
     Recupera una venta específica por su ID.
 
@@ -159,7 +315,7 @@ async def read_venta(venta_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Si la venta no existe
     """
-    venta = db.query(VentaModel).filter(VentaModel.id == venta_id).first()
+    venta = db.get(VentaModel, venta_id, options=_venta_load_options())
     if not venta:
         raise HTTPException(status_code=404, detail="Venta no encontrada")
     return venta
\ No newline at end of file
@@ -1,11 +1,21 @@
 from typing import Optional, List, Callable, Any
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from functools import wraps
+from cachetools import TTLCache
+from datetime import datetime
+import threading
 import logging
+import orjson
 
-from app.core.security import verificar_token_acceso, SecurityError
+from app.core.cache import get_redis
+from app.core.security import (
+    verificar_token_acceso,
+    validate_token_scopes,
+    SecurityError
+)
 from app.db.session import get_db
 from app.models.usuario import Usuario
 
@@ -22,6 +32,117 @@ oauth2_scheme = OAuth2PasswordBearer(
     }
 )
 
+# Caché en proceso de los usuarios autenticados para evitar una consulta por petición.
+# Se guardan solo columnas (nunca el hash de la contraseña) y el TTL acota cuánto
+# tiempo puede quedar desactualizado un usuario modificado desde otro proceso.
+USER_CACHE_TTL_SECONDS = 60
+_USER_CACHE_FIELDS = ("id", "username", "email", "rol", "fecha_registro", "activo")
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
+
+# Segundo nivel compartido entre workers en Redis (si REDIS_URL está configurada).
+# Las modificaciones invalidan la clave, pero una petición que leyó la fila antes
+# del commit puede escribirla después de la invalidación: el TTL, igual al de la
+# caché en proceso y no a la vida del token, acota cuánto dura esa fila antigua.
+REDIS_USER_CACHE_TTL_SECONDS = USER_CACHE_TTL_SECONDS
+
+def _redis_user_key(username: str) -> str:
+    """Clave de Redis para el usuario indicado."""
+    return f"user:{username}"
+
+def _get_redis_user(username: str) -> Optional[dict]:
+    """
+    Busca el usuario en la caché de Redis.
+
+    Args:
+        username (str): Nombre de usuario
+
+    Returns:
+        Optional[dict]: Columnas cacheadas del usuario o None si no está o Redis falla
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        data = client.get(_redis_user_key(username))
+    except Exception as e:
+        logger.warning(f"Caché Redis no disponible: {str(e)}")
+        return None
+    if data is None:
+        return None
+    cached = orjson.loads(data)
+    cached["fecha_registro"] = datetime.fromisoformat(cached["fecha_registro"])
+    return cached
+
+def _set_redis_user(username: str, cached: dict) -> None:
+    """
+    Guarda las columnas del usuario en la caché de Redis.
+
+    Args:
+        username (str): Nombre de usuario
+        cached (dict): Columnas del usuario a cachear
+    """
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(_redis_user_key(username), REDIS_USER_CACHE_TTL_SECONDS, orjson.dumps(cached))
+    except Exception as e:
+        logger.warning(f"Caché Redis no disponible: {str(e)}")
+
+def get_cached_user(db: Session, username: str) -> Optional[Usuario]:
+    """
+    Obtiene un usuario por su username usando la caché en proceso y, si está
+    configurada, la caché compartida en Redis antes de consultar la base de datos.
+    
+    Args:
+        db (Session): Sesión de base de datos
+        username (str): Nombre de usuario
+        
+    Returns:
+        Optional[Usuario]: Usuario encontrado o None si no existe
+    """
+    with _user_cache_lock:
+        cached = _user_cache.get(username)
+    if cached is not None:
+        return Usuario(**cached)
+
+    cached = _get_redis_user(username)
+    if cached is not None:
+        with _user_cache_lock:
+            _user_cache[username] = cached
+        return Usuario(**cached)
+
+    # Usuario no tiene relaciones: basta traer las columnas que se cachean como
+    # una fila, sin el hash de la contraseña ni la hidratación del objeto ORM
+    row = db.execute(
+        select(*(getattr(Usuario, field) for field in _USER_CACHE_FIELDS))
+        .where(Usuario.username == username)
+    ).mappings().first()
+    if row is None:
+        return None
+    cached = dict(row)
+    with _user_cache_lock:
+        _user_cache[username] = cached
+    _set_redis_user(username, cached)
+    return Usuario(**cached)
+
+def invalidate_cached_user(username: str) -> None:
+    """
+    Elimina un usuario de la caché, por ejemplo tras modificarlo o desactivarlo.
+    
+    Args:
+        username (str): Nombre de usuario
+    """
+    with _user_cache_lock:
+        _user_cache.pop(username, None)
+    client = get_redis()
+    if client is not None:
+        try:
+            client.delete(_redis_user_key(username))
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar el usuario en Redis: {str(e)}")
+
 class AuthDependency:
     """
     Clase que proporciona las dependencias de autenticación y autorización.
@@ -41,13 +162,17 @@ class AuthDependency:
     def _initialize(self):
         """Inicializa la instancia con la configuración necesaria."""
         self.oauth2_scheme = oauth2_scheme
+        # frozenset: pertenencia O(1) en la verificación de scopes de cada petición
         self._role_permissions = {
-            "admin": ["admin", "vendedor", "usuario"],
-            "vendedor": ["vendedor", "usuario"],
-            "usuario": ["usuario"]
+            "admin": frozenset({"admin", "vendedor", "usuario"}),
+            "vendedor": frozenset({"vendedor", "usuario"}),
+            "usuario": frozenset({"usuario"})
         }
     
-    async def get_current_user(
+    # Síncrona a propósito: la consulta a Redis y la de la base de datos son
+    # bloqueantes, así que FastAPI la ejecuta en el threadpool y una caché lenta
+    # o caída retrasa solo esta petición, no el event loop del worker
+    def get_current_user(
         self,
         security_scopes: SecurityScopes,
         token: str = Depends(oauth2_scheme),
@@ -88,7 +213,7 @@ class AuthDependency:
                 logger.error(f"Error al verificar token: {str(e)}")
                 raise credentials_exception
                 
-            user = db.query(Usuario).filter(Usuario.username == username).first()
+            user = get_cached_user(db, username)
             if user is None:
                 logger.warning(f"Usuario no encontrado: {username}")
                 raise credentials_exception
@@ -100,16 +225,17 @@ class AuthDependency:
                 )
                 
             # Verificar permisos
-            for scope in security_scopes.scopes:
-                if scope not in self._role_permissions.get(user.rol, []):
-                    logger.warning(
-                        f"Usuario {username} intentó acceder a recurso sin permiso: {scope}"
-                    )
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="No tiene suficientes permisos",
-                        headers={"WWW-Authenticate": authenticate_value},
-                    )
+            permisos = self._role_permissions.get(user.rol, frozenset())
+            if not validate_token_scopes(security_scopes.scopes, permisos):
+                faltantes = ", ".join(s for s in security_scopes.scopes if s not in permisos)
+                logger.warning(
+                    f"Usuario {username} intentó acceder a recurso sin permiso: {faltantes}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="No tiene suficientes permisos",
+                    headers={"WWW-Authenticate": authenticate_value},
+                )
                     
             return user
             
@@ -127,24 +253,24 @@ class AuthDependency:
         current_user: Usuario = Security(get_current_user, scopes=["usuario"])
     ) -> Usuario:
         """
-        Verifica que el usuario actual esté activo.
+        Retorna el usuario actual activo.
+
+        get_current_user ya rechaza a los usuarios inactivos, por lo que aquí
+        no se repite la verificación.
         
         Args:
             current_user (Usuario): Usuario actual
             
         Returns:
             Usuario: Usuario activo verificado
-            
-        Raises:
-            HTTPException: Si el usuario está inactivo
         """
-        if not current_user.activo:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Usuario inactivo"
-            )
         return current_user
 
+# Instancia global de las dependencias de autenticación. La dependencia del
+# usuario actual se resuelve una sola vez y la comparten los verificadores de rol
+auth_dependency = AuthDependency()
+_get_current_user = auth_dependency.get_current_user
+
 def check_roles(roles: List[str]) -> Callable:
     """
     Decorador para verificar roles de usuario.
@@ -155,10 +281,12 @@ def check_roles(roles: List[str]) -> Callable:
     Returns:
         Callable: Decorador configurado
     """
+    roles_permitidos = frozenset(roles)
+
     def decorator(func: Callable) -> Callable:
         @wraps(func)
-        async def wrapper(*args: Any, current_user: Usuario = Depends(AuthDependency().get_current_user), **kwargs: Any) -> Any:
-            if current_user.rol not in roles:
+        async def wrapper(*args: Any, current_user: Usuario = Depends(_get_current_user), **kwargs: Any) -> Any:
+            if current_user.rol not in roles_permitidos:
                 logger.warning(
                     f"Usuario {current_user.username} intentó acceder a recurso restringido"
                 )
@@ -190,9 +318,9 @@ class RoleChecker:
         Args:
             allowed_roles (List[str]): Lista de roles permitidos
         """
-        self.allowed_roles = allowed_roles
+        self.allowed_roles = frozenset(allowed_roles)
 
-    def __call__(self, user: Usuario = Depends(AuthDependency().get_current_user)) -> bool:
+    def __call__(self, user: Usuario = Depends(_get_current_user)) -> bool:
         """
         Verifica si el usuario tiene los roles permitidos.
         
@@ -214,6 +342,3 @@ class RoleChecker:
                 detail="No tiene permisos suficientes para esta operación"
             )
         return True
-
-# Instancia global de las dependencias de autenticación
-auth_dependency = AuthDependency()
\ No newline at end of file
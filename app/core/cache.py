@@ -0,0 +1,40 @@
+from typing import Optional
+import threading
+import logging
+
+try:
+    import redis
+except ImportError:  # Redis es opcional: sin él solo se usan las cachés en proceso
+    redis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+def get_redis() -> Optional["redis.Redis"]:
+    """
+    Retorna el cliente Redis compartido por el proceso.
+
+    El cliente se crea una sola vez, en el primer uso, y mantiene su propio
+    pool de conexiones. Si REDIS_URL no está configurada o el paquete redis
+    no está instalado, retorna None y los llamadores deben omitir la caché.
+
+    Returns:
+        Optional[redis.Redis]: Cliente Redis o None si no está disponible
+    """
+    global _redis_client
+    if redis is None or not settings.REDIS_URL:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                # Timeouts cortos: una caché caída no debe bloquear las peticiones
+                _redis_client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=0.1,
+                    socket_connect_timeout=0.1
+                )
+    return _redis_client
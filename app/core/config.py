@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 class Settings(BaseSettings):
     """
@@ -15,6 +15,20 @@ class Settings(BaseSettings):
         DATABASE_NAME (str): Nombre de la base de datos
         SECRET_KEY (str): Clave secreta para JWT
         ACCESS_TOKEN_EXPIRE_MINUTES (int): Tiempo de expiración del token en minutos
+        DEBUG (bool): Activa las comprobaciones de desarrollo (p. ej. raiseload en consultas ORM)
+        DB_POOL_SIZE (int): Conexiones persistentes del pool por proceso
+        DB_MAX_OVERFLOW (int): Conexiones adicionales permitidas en picos de carga
+        DB_POOL_TIMEOUT (int): Segundos de espera por una conexión libre antes de fallar
+        DB_POOL_RECYCLE (int): Segundos tras los que una conexión se recicla
+        DB_POOL_PRE_PING (bool): Verifica cada conexión al tomarla del pool (un round-trip extra)
+        REDIS_URL (Optional[str]): URL de Redis para la caché compartida entre workers (opcional)
+
+    Valores orientativos del pool por worker de uvicorn, teniendo en cuenta que
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) no debe superar max_connections
+    de PostgreSQL:
+        - Pequeño (1-2 workers, desarrollo): DB_POOL_SIZE=5, DB_MAX_OVERFLOW=5
+        - Mediano (4 workers): DB_POOL_SIZE=10, DB_MAX_OVERFLOW=10
+        - Grande (8+ workers o detrás de pgbouncer): DB_POOL_SIZE=20, DB_MAX_OVERFLOW=40
     """
     PROJECT_NAME: str = "SalesOptimizer"
     
@@ -28,6 +42,19 @@ class Settings(BaseSettings):
     # Configuración de seguridad
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+
+    # Modo desarrollo
+    DEBUG: bool = False
+
+    # Pool de conexiones de SQLAlchemy
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+
+    # Caché compartida (opcional)
+    REDIS_URL: Optional[str] = None
     
     class Config:
         """
@@ -36,10 +63,12 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
 
-    @property
+    @cached_property
     def DATABASE_URL(self) -> str:
         """
         Construye y retorna la URL de conexión a la base de datos.
+
+        Se calcula una sola vez: la configuración no cambia tras cargarse.
         
         Returns:
             str: URL de conexión a la base de datos
@@ -1,8 +1,21 @@
 import os
+import asyncio
+import base64
+import calendar
+import hashlib
+import hmac
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Any, Dict, Iterable, Optional, Tuple
+from jose import ExpiredSignatureError, JWTError, jwt
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import VerificationError
+import bcrypt
+from cachetools import TTLCache
+import orjson
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
 
@@ -13,9 +26,54 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
-# Contexto para el hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hasher de contraseñas.
+# Argon2id es el esquema por defecto; bcrypt se mantiene solo para verificar
+# hashes existentes, que se consideran obsoletos y se rehashean al hacer login.
+# Parámetros calibrados para que una verificación tome ~150-250 ms.
+_password_hasher = PasswordHasher(
+    time_cost=3,
+    memory_cost=64 * 1024,
+    parallelism=4,
+    hash_len=32,
+    type=Type.ID
+)
+_ARGON2_PREFIX = "$argon2"
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+# bcrypt solo usa los primeros 72 bytes; passlib truncaba en silencio
+_BCRYPT_MAX_BYTES = 72
+
+@lru_cache()
+def get_dummy_password_hash() -> str:
+    """
+    Retorna el hash de referencia para verificar cuando el usuario no existe,
+    de modo que el tiempo de respuesta del login no revele qué usuarios existen.
+
+    Se calcula en el primer uso y no al importar el módulo: un hash Argon2
+    cuesta cientos de milisegundos y retrasaría el arranque de cada worker.
+
+    Returns:
+        str: Hash Argon2id con los parámetros actuales
+    """
+    return _password_hasher.hash("dummy-password")
+
+# Caché de verificaciones exitosas: repetir el login con la misma credencial
+# no vuelve a pagar el costo de Argon2. Solo se guardan los aciertos, de modo
+# que las contraseñas incorrectas siempre cuestan una verificación completa.
+# La clave es un BLAKE2b con una llave aleatoria del proceso, por lo que
+# la caché no sirve para atacar contraseñas fuera de línea.
+_verify_cache: TTLCache = TTLCache(maxsize=2048, ttl=60)
+_verify_cache_lock = threading.Lock()
+_VERIFY_CACHE_KEY = os.urandom(32)
+
+def _verify_cache_key(plain_password: str, hashed_password: str) -> bytes:
+    """Digest de la contraseña y su hash usado como clave de la caché."""
+    return hashlib.blake2b(
+        plain_password.encode() + b"\0" + hashed_password.encode(),
+        key=_VERIFY_CACHE_KEY,
+        digest_size=32
+    ).digest()
 
 class SecurityError(Exception):
     """
@@ -44,13 +102,45 @@ def get_password_hash(password: str) -> str:
         SecurityError: Si ocurre un error durante el proceso de hashing
     """
     try:
-        return pwd_context.hash(password)
+        return _password_hasher.hash(password)
     except Exception as e:
         raise SecurityError(
             f"Error al generar hash de contraseña: {str(e)}",
             status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _verificar_hash(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifica una contraseña contra un hash Argon2 o bcrypt.
+
+    Args:
+        plain_password (str): Contraseña en texto plano
+        hashed_password (str): Hash de la contraseña almacenado
+
+    Returns:
+        bool: True si la contraseña coincide, False en caso contrario
+
+    Raises:
+        ValueError: Si el hash no corresponde a ningún esquema soportado
+    """
+    if hashed_password.startswith(_ARGON2_PREFIX):
+        try:
+            return _password_hasher.verify(hashed_password, plain_password)
+        except VerificationError:
+            return False
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return bcrypt.checkpw(
+            plain_password.encode()[:_BCRYPT_MAX_BYTES],
+            hashed_password.encode()
+        )
+    raise ValueError("hash could not be identified")
+
+def _necesita_rehash(hashed_password: str) -> bool:
+    """Indica si el hash usa un esquema o parámetros distintos a los actuales."""
+    if not hashed_password.startswith(_ARGON2_PREFIX):
+        return True
+    return _password_hasher.check_needs_rehash(hashed_password)
+
 def verificar_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica si una contraseña coincide con su hash.
@@ -65,13 +155,184 @@ def verificar_password(plain_password: str, hashed_password: str) -> bool:
     Raises:
         SecurityError: Si ocurre un error durante la verificación
     """
+    key = _verify_cache_key(plain_password, hashed_password)
+    with _verify_cache_lock:
+        if key in _verify_cache:
+            return True
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        valido = _verificar_hash(plain_password, hashed_password)
     except Exception as e:
         raise SecurityError(
             f"Error al verificar contraseña: {str(e)}",
             status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    if valido:
+        with _verify_cache_lock:
+            _verify_cache[key] = True
+    return valido
+
+def verificar_y_actualizar_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica una contraseña y, si su hash usa parámetros obsoletos, genera uno nuevo.
+    
+    Args:
+        plain_password (str): Contraseña en texto plano
+        hashed_password (str): Hash de la contraseña almacenado
+        
+    Returns:
+        Tuple[bool, Optional[str]]: Resultado de la verificación y el nuevo hash
+            a almacenar, o None si el hash actual sigue vigente
+        
+    Raises:
+        SecurityError: Si ocurre un error durante la verificación
+    """
+    key = _verify_cache_key(plain_password, hashed_password)
+    with _verify_cache_lock:
+        if key in _verify_cache:
+            # Solo se cachean hashes vigentes, así que no hay nada que migrar
+            return True, None
+    try:
+        valido = _verificar_hash(plain_password, hashed_password)
+        nuevo_hash = (
+            _password_hasher.hash(plain_password)
+            if valido and _necesita_rehash(hashed_password) else None
+        )
+    except Exception as e:
+        raise SecurityError(
+            f"Error al verificar contraseña: {str(e)}",
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    if valido and nuevo_hash is None:
+        with _verify_cache_lock:
+            _verify_cache[key] = True
+    return valido, nuevo_hash
+
+# Pool dedicado al hashing: argon2-cffi y bcrypt liberan el GIL, por lo que
+# los hilos se ejecutan en paralelo sin bloquear el event loop ni competir
+# con el threadpool que FastAPI usa para los endpoints síncronos.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="password-hash"
+)
+
+async def aget_password_hash(password: str) -> str:
+    """
+    Versión asíncrona de get_password_hash para usar desde endpoints async.
+
+    Args:
+        password (str): Contraseña en texto plano
+
+    Returns:
+        str: Hash de la contraseña
+
+    Raises:
+        SecurityError: Si ocurre un error durante el proceso de hashing
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+async def averificar_y_actualizar_password(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Versión asíncrona de verificar_y_actualizar_password para usar desde endpoints async.
+
+    Args:
+        plain_password (str): Contraseña en texto plano
+        hashed_password (str): Hash de la contraseña almacenado
+
+    Returns:
+        Tuple[bool, Optional[str]]: Resultado de la verificación y el nuevo hash
+            a almacenar, o None si el hash actual sigue vigente
+
+    Raises:
+        SecurityError: Si ocurre un error durante la verificación
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, verificar_y_actualizar_password, plain_password, hashed_password
+    )
+
+# Partes constantes del JWT precalculadas: la cabecera HS256 codificada y un
+# HMAC ya inicializado con la clave, que se copia en lugar de recrearse.
+_JWT_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+_JWT_HMAC = hmac.new(SECRET_KEY.encode(), digestmod=hashlib.sha256) if SECRET_KEY else None
+# Claims de tiempo que, como en python-jose, se serializan como timestamp Unix
+_JWT_TIME_CLAIMS = ("exp", "iat", "nbf")
+# Claims registrados que la verificación rápida no valida; los tokens que los
+# incluyen se verifican con python-jose
+_JWT_DELEGATED_CLAIMS = frozenset(("aud", "iat", "nbf", "iss", "jti", "at_hash"))
+
+def _b64url(data: bytes) -> bytes:
+    """Codifica en base64url sin relleno, como exige JWT."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def _encode_jwt(claims: Dict[str, Any]) -> str:
+    """
+    Codifica y firma un JWT HS256 con la clave de la aplicación.
+
+    Produce el mismo token que jwt.encode de python-jose, sin reconstruir la
+    cabecera ni derivar la clave HMAC en cada llamada.
+
+    Args:
+        claims (Dict[str, Any]): Claims del token; se modifica en el lugar
+
+    Returns:
+        str: Token JWT firmado
+    """
+    if _JWT_HMAC is None:
+        raise ValueError("SECRET_KEY no está configurada")
+    for claim in _JWT_TIME_CLAIMS:
+        if isinstance(claims.get(claim), datetime):
+            claims[claim] = calendar.timegm(claims[claim].utctimetuple())
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(orjson.dumps(claims))
+    signer = _JWT_HMAC.copy()
+    signer.update(signing_input)
+    return (signing_input + b"." + _b64url(signer.digest())).decode()
+
+def _b64url_decode(data: str) -> bytes:
+    """Decodifica base64url restaurando el relleno omitido."""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _decode_jwt(token: str) -> Dict[str, Any]:
+    """
+    Verifica y decodifica un JWT HS256 emitido por esta aplicación.
+
+    Los tokens con la cabecera de _encode_jwt y solo los claims sub y exp se
+    verifican con el HMAC precalculado. Cualquier otro caso, incluidos los
+    tokens inválidos, se delega a jwt.decode de python-jose, que conserva sus
+    validaciones y mensajes de error.
+
+    Args:
+        token (str): Token JWT a verificar
+
+    Returns:
+        Dict[str, Any]: Payload del token
+
+    Raises:
+        JWTError: Si el token es inválido o ha expirado
+    """
+    parts = token.split(".")
+    if _JWT_HMAC is not None and len(parts) == 3 and parts[0].encode() == _JWT_HEADER_B64:
+        signing_input, signature = token.rsplit(".", 1)
+        signer = _JWT_HMAC.copy()
+        signer.update(signing_input.encode())
+        try:
+            valid = hmac.compare_digest(signer.digest(), _b64url_decode(signature))
+            payload = orjson.loads(_b64url_decode(parts[1])) if valid else None
+        except (ValueError, orjson.JSONDecodeError):
+            payload = None
+        if (
+            isinstance(payload, dict)
+            and isinstance(payload.get("exp", 0), int)
+            and isinstance(payload.get("sub", ""), str)
+            and _JWT_DELEGATED_CLAIMS.isdisjoint(payload)
+        ):
+            if "exp" in payload and payload["exp"] < int(time.time()):
+                raise ExpiredSignatureError("Signature has expired.")
+            return payload
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
 def crear_token_acceso(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -79,7 +340,8 @@ def crear_token_acceso(data: Dict[str, Any], expires_delta: Optional[timedelta]
     
     Args:
         data (Dict[str, Any]): Datos a incluir en el token
-        expires_delta (Optional[timedelta]): Tiempo de expiración del token
+        expires_delta (Optional[timedelta]): Tiempo de expiración del token;
+            por defecto ACCESS_TOKEN_EXPIRE_MINUTES
         
     Returns:
         str: Token JWT generado
@@ -89,20 +351,59 @@ def crear_token_acceso(data: Dict[str, Any], expires_delta: Optional[timedelta]
     """
     try:
         to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=15)
-            
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-        return encoded_jwt
+        # exp es un NumericDate: segundos enteros desde la época, sin pasar por datetime
+        expire_seconds = (
+            int(expires_delta.total_seconds()) if expires_delta else ACCESS_TOKEN_EXPIRE_SECONDS
+        )
+        to_encode["exp"] = int(time.time()) + expire_seconds
+        return _encode_jwt(to_encode)
     except Exception as e:
         raise SecurityError(
             f"Error al crear token de acceso: {str(e)}",
             status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+# Caché de tokens ya verificados: un mismo cliente reenvía su token en cada
+# petición, y la verificación (HMAC + base64 + JSON) es determinista hasta que
+# el token expira. La clave es un digest BLAKE2b del token, no el token en sí.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_token_cache_lock = threading.Lock()
+
+def _token_cache_key(token: str) -> bytes:
+    """Digest de 16 bytes del token usado como clave de la caché."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _decode_cached(token: str) -> Dict[str, Any]:
+    """
+    Decodifica y verifica un token JWT reutilizando la caché de tokens verificados.
+
+    Args:
+        token (str): Token JWT a decodificar
+
+    Returns:
+        Dict[str, Any]: Copia del payload del token
+
+    Raises:
+        JWTError: Si el token es inválido o ha expirado
+    """
+    key = _token_cache_key(token)
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+    if cached is not None:
+        # La entrada puede sobrevivir a la expiración del token dentro del TTL
+        if cached.get("exp") is None or cached["exp"] > time.time():
+            return dict(cached)
+        with _token_cache_lock:
+            _token_cache.pop(key, None)
+        raise ExpiredSignatureError("Signature has expired.")
+
+    payload = _decode_jwt(token)
+    # Solo se cachean los tokens válidos
+    if payload:
+        with _token_cache_lock:
+            _token_cache[key] = payload
+    return dict(payload)
+
 def verificar_token_acceso(token: str) -> Dict[str, Any]:
     """
     Verifica y decodifica un token JWT.
@@ -117,7 +418,7 @@ def verificar_token_acceso(token: str) -> Dict[str, Any]:
         SecurityError: Si el token es inválido o ha expirado
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_cached(token)
         if not payload:
             raise SecurityError("No se pudo validar credenciales")
         return payload
@@ -129,15 +430,15 @@ def verificar_token_acceso(token: str) -> Dict[str, Any]:
             status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-def validate_token_scopes(required_scopes: list[str], token_scopes: list[str]) -> bool:
+def validate_token_scopes(required_scopes: Iterable[str], token_scopes: Iterable[str]) -> bool:
     """
     Valida que el token tenga los scopes requeridos.
     
     Args:
-        required_scopes (list[str]): Lista de scopes requeridos
-        token_scopes (list[str]): Lista de scopes del token
+        required_scopes (Iterable[str]): Scopes requeridos
+        token_scopes (Iterable[str]): Scopes del token; un set o frozenset evita la conversión
         
     Returns:
         bool: True si el token tiene los scopes requeridos, False en caso contrario
     """
-    return all(scope in token_scopes for scope in required_scopes)
\ No newline at end of file
+    return frozenset(required_scopes).issubset(token_scopes)
\ No newline at end of file
@@ -1,9 +1,12 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.config import settings
+
 class Database:
     def __init__(self):
         load_dotenv()
@@ -15,21 +18,78 @@ class Database:
         self.SQLALCHEMY_DATABASE_URL = (
             f"postgresql://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
         )
+        self.SQLALCHEMY_ASYNC_DATABASE_URL = self.SQLALCHEMY_DATABASE_URL.replace(
+            "postgresql://", "postgresql+asyncpg://", 1
+        )
         self.engine = self.create_engine()
         self.SessionLocal = self.create_session()
+        self.async_engine = self.create_async_engine()
+        self.AsyncSessionLocal = self.create_async_session()
         self.Base = self.create_base()
 
     def create_engine(self):
         """
         Crear un motor de base de datos SQLAlchemy
+
+        La caché de sentencias compiladas cubre con holgura las consultas de los
+        endpoints, de modo que tras el arranque ninguna petición vuelve a compilar SQL.
+        El pool se dimensiona desde Settings (DB_POOL_*). Por defecto no se usa
+        pool_pre_ping (un round-trip extra por checkout): las conexiones se
+        reciclan tras DB_POOL_RECYCLE segundos y los keepalives TCP detectan las caídas.
+        El pool es LIFO: se reutilizan siempre las conexiones más recientes y las
+        sobrantes quedan inactivas hasta que el servidor o el reciclado las cierran.
+        Con values_plus_batch, los executemany de UPDATE (p. ej. el stock en las
+        ventas) también se agrupan con execute_batch de psycopg2, además de los
+        INSERT multi-VALUES.
         """
-        return create_engine(self.SQLALCHEMY_DATABASE_URL)
+        return create_engine(
+            self.SQLALCHEMY_DATABASE_URL,
+            query_cache_size=2000,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_use_lifo=True,
+            connect_args={"keepalives": 1, "keepalives_idle": 30},
+            executemany_mode="values_plus_batch",
+            insertmanyvalues_page_size=1000,
+            executemany_batch_page_size=500
+        )
 
     def create_session(self):
         """
         Crear una sesión de base de datos SQLAlchemy
+
+        expire_on_commit=False conserva los atributos de los objetos tras el
+        commit, de modo que devolverlos no requiere un SELECT adicional (refresh)
+        """
+        return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine)
+
+    def create_async_engine(self):
+        """
+        Crear un motor asíncrono de SQLAlchemy sobre asyncpg
+
+        Lo usan los endpoints async def, que así no ocupan un hilo del threadpool
+        mientras esperan a la base de datos. Convive con el motor síncrono, por lo
+        que su pool es pequeño para no duplicar las conexiones por worker.
+        """
+        return create_async_engine(
+            self.SQLALCHEMY_ASYNC_DATABASE_URL,
+            query_cache_size=2000,
+            pool_size=5,
+            max_overflow=5,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_use_lifo=True
+        )
+
+    def create_async_session(self):
+        """
+        Crear una fábrica de sesiones asíncronas de SQLAlchemy
         """
-        return sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        return async_sessionmaker(self.async_engine, class_=AsyncSession, expire_on_commit=False)
 
     def create_base(self):
         """
@@ -41,4 +101,6 @@ class Database:
 db = Database()
 engine = db.engine
 SessionLocal = db.SessionLocal
+async_engine = db.async_engine
+AsyncSessionLocal = db.AsyncSessionLocal
 Base = db.Base
\ No newline at end of file
@@ -1,18 +1,36 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm import declarative_base
-from app.core.config import settings
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
 
-SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-Base = declarative_base()
+from app.db.base import engine, SessionLocal, AsyncSessionLocal, Base
 
 def get_db():
+    """
+    Proporciona una sesión de base de datos por petición.
+
+    Todas las dependencias comparten el motor (y su pool de conexiones)
+    definido en app.db.base, y la sesión se cierra al finalizar la petición.
+    Si el endpoint lanza una excepción, la transacción se revierte aquí, de
+    modo que los endpoints no necesitan sus propios db.rollback().
+    """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Proporciona una sesión asíncrona de base de datos por petición.
+
+    Equivalente a get_db para los endpoints async def: la sesión usa el motor
+    asyncpg y se revierte si el endpoint lanza una excepción.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
@@ -1,14 +1,47 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import sys
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import inspect
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import cliente, detalle_venta, producto, recomendacion, usuario, venta
-from app.db.base import engine, SessionLocal, Base
+from app.db.base import engine, async_engine, Base
+from app.db.session import get_db, get_async_db
 from app.api.endpoints import clientes, recomendaciones, seed, usuarios, productos, auth, ventas
+from app.utils.responses import ORJSONResponse
+
+# Consulta de salud construida una sola vez; sin parámetros, se envía tal cual al driver
+_HEALTH_CHECK_STMT = text("SELECT 1")
+
+# Tablas que debe crear Base.metadata.create_all al arrancar
+EXPECTED_TABLES = (
+    "usuarios",
+    "clientes",
+    "ventas",
+    "productos",
+    "detalles_venta",
+    "recomendaciones"
+)
+# Verificación del esquema en un solo round-trip: tablas faltantes (resueltas
+# con el search_path, como create_all) y presencia de productos.baja_rotacion
+_VERIFY_SCHEMA_STMT = text("""
+    SELECT
+        ARRAY(
+            SELECT t FROM unnest(CAST(:tables AS text[])) AS t
+            WHERE to_regclass(t) IS NULL
+        ) AS missing,
+        EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema()
+              AND table_name = 'productos'
+              AND column_name = 'baja_rotacion'
+        ) AS has_baja_rotacion
+""")
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -24,9 +57,17 @@ console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 
-# Añadir los manejadores al logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# Los manejadores se ejecutan en el hilo del QueueListener: las llamadas al
+# logger solo encolan el registro y no esperan la escritura en disco o consola
+log_queue: queue.Queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+# Detener el listener al salir del proceso vacía la cola antes de terminar
+atexit.register(log_listener.stop)
+
+logger.addHandler(QueueHandler(log_queue))
+# Los manejadores propios ya escriben en consola; no repetir en el logger raíz
+logger.propagate = False
 
 app = FastAPI(title="SalesOptimizer API", version="0.1.0")
 
@@ -35,10 +76,33 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En producción, especificar los orígenes permitidos
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Métodos y cabeceras concretos: se comprueban por pertenencia a un conjunto
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["Authorization", "Content-Type"],
+    # Cabeceras de paginación por cursor legibles desde el navegador
+    expose_headers=["X-Next-Cursor", "X-Next-Cursor-Fecha", "X-Next-Cursor-Id"],
+    # Los navegadores reutilizan la respuesta del preflight durante una hora
+    max_age=3600,
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    """
+    Manejador único para los errores no controlados de los endpoints.
+
+    El rollback de la sesión lo hace la dependencia get_db; aquí solo se
+    registra el error y se devuelve una respuesta 500 uniforme.
+
+    Args:
+        request (Request): Petición que produjo el error
+        exc (Exception): Excepción no controlada
+
+    Returns:
+        JSONResponse: Respuesta con el error interno
+    """
+    logger.exception(f"Error no controlado en {request.method} {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=500, content={"detail": "Error interno del servidor"})
+
 # Incluir routers
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(usuarios.router, prefix="/usuarios", tags=["usuarios"])
@@ -48,39 +112,24 @@ app.include_router(ventas.router, prefix="/ventas", tags=["ventas"])
 app.include_router(recomendaciones.router, prefix="/recomendaciones", tags=["recomendaciones"])
 app.include_router(seed.router, prefix="/seed", tags=["seeding"])
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def verify_table_creation():
     """
     Verifica que todas las tablas del modelo de datos se hayan creado correctamente en la base de datos.
     """
-    inspector = inspect(engine)
-    tables = inspector.get_table_names()
-
-    expected_tables = [
-        "usuarios",
-        "clientes",
-        "ventas",
-        "productos",
-        "detalles_venta",
-        "recomendaciones"
-    ]
-
-    for table in expected_tables:
-        if table in tables:
-            logger.info(f"Tabla '{table}' creada correctamente.")
-        else:
-            logger.error(f"Tabla '{table}' no encontrada.")
-
-    # Verificar columnas de la tabla productos
-    columns = [column['name'] for column in inspector.get_columns('productos')]
-    if 'baja_rotacion' in columns:
+    with engine.connect() as connection:
+        missing, has_baja_rotacion = connection.execute(
+            _VERIFY_SCHEMA_STMT, {"tables": list(EXPECTED_TABLES)}
+        ).one()
+
+    if missing:
+        logger.error(f"Tablas no encontradas: {', '.join(missing)}")
+    else:
+        logger.info("Todas las tablas se crearon correctamente.")
+
+    # Verificar columnas de la tabla productos solo si existe
+    if "productos" in missing:
+        return
+    if has_baja_rotacion:
         logger.info("Campo 'baja_rotacion' encontrado en la tabla 'productos'.")
     else:
         logger.error("Campo 'baja_rotacion' no encontrado en la tabla 'productos'.")
@@ -96,7 +145,15 @@ async def startup_event():
     logger.info("Tablas creadas. Verificando estructura de la base de datos...")
     verify_table_creation()
 
-@app.get("/")
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Evento que se ejecuta al detener la aplicación.
+    Cierra las conexiones del pool asíncrono.
+    """
+    await async_engine.dispose()
+
+@app.get("/", response_class=ORJSONResponse)
 def read_root():
     """
     Endpoint raíz que retorna un mensaje de bienvenida.
@@ -106,13 +163,13 @@ def read_root():
     """
     return {"message": "Bienvenido a SalesOptimizer API"}
 
-@app.get("/health")
-def health_check(db: Session = Depends(get_db)):
+@app.get("/health", response_class=ORJSONResponse)
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para verificar el estado de la aplicación.
     
     Args:
-        db (Session): Sesión de base de datos
+        db (AsyncSession): Sesión asíncrona de base de datos
         
     Returns:
         dict: Estado de la aplicación y la base de datos
@@ -122,7 +179,7 @@ def health_check(db: Session = Depends(get_db)):
     """
     try:
         # Intenta hacer una consulta simple para verificar la conexión
-        db.execute("SELECT 1")
+        await db.execute(_HEALTH_CHECK_STMT)
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         logger.error(f"Error de salud en la API: {str(e)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime
@@ -29,5 +29,10 @@ class Cliente(Base):
     historial_compras = relationship("Venta", back_populates="cliente")
     recomendaciones = relationship("Recomendacion", back_populates="cliente")
 
+    __table_args__ = (
+        # Índice funcional para búsquedas de email sin distinguir mayúsculas
+        Index("ix_clientes_email_lower", func.lower(email), unique=True),
+    )
+
     def __repr__(self):
         return f"<Cliente(id={self.id}, nombre='{self.nombre}', email='{self.email}')>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -29,5 +29,12 @@ class DetalleVenta(Base):
     venta = relationship("Venta", back_populates="detalles_venta")
     producto = relationship("Producto", back_populates="detalles_venta")
 
+    # Índices compuestos en ambos sentidos: detalles de una venta, y ventas que
+    # contienen un producto (productos comprados juntos), resueltos solo con el índice
+    __table_args__ = (
+        Index("ix_detalles_venta_venta_producto", venta_id, producto_id),
+        Index("ix_detalles_venta_producto_venta", producto_id, venta_id),
+    )
+
     def __repr__(self):
         return f"<DetalleVenta(id={self.id}, venta_id={self.venta_id}, producto_id={self.producto_id}, cantidad={self.cantidad})>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime
@@ -27,5 +27,10 @@ class Usuario(Base):
     fecha_registro = Column(DateTime, default=datetime.utcnow)
     activo = Column(Boolean, default=True)
 
+    __table_args__ = (
+        # Índice funcional para búsquedas de email sin distinguir mayúsculas
+        Index("ix_usuarios_email_lower", func.lower(email), unique=True),
+    )
+
     def __repr__(self):
         return f"<Usuario(id={self.id}, username='{self.username}', email='{self.email}', rol='{self.rol}')>"
\ No newline at end of file
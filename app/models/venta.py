@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from datetime import datetime
@@ -28,5 +28,12 @@ class Venta(Base):
     cliente = relationship("Cliente", back_populates="historial_compras")
     detalles_venta = relationship("DetalleVenta", back_populates="venta")
 
+    # Índices para la paginación por cursor de los listados (más recientes primero),
+    # general y filtrada por cliente
+    __table_args__ = (
+        Index("ix_ventas_fecha_venta_id", fecha_venta.desc(), id.desc()),
+        Index("ix_ventas_cliente_fecha_id", cliente_id, fecha_venta.desc(), id.desc()),
+    )
+
     def __repr__(self):
         return f"<Venta(id={self.id}, cliente_id={self.cliente_id}, fecha_venta='{self.fecha_venta}', total={self.total})>"
\ No newline at end of file
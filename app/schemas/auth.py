@@ -1,7 +1,11 @@
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator, model_validator
 from datetime import datetime
 
+# Roles permitidos en el registro; una comprobación de pertenencia es más
+# barata que evaluar una expresión regular con alternativas
+_ROLES_VALIDOS = frozenset(('admin', 'usuario', 'vendedor'))
+
 class TokenBase(BaseModel):
     """
     Schema base para tokens de autenticación.
@@ -40,6 +44,22 @@ class UserAuthBase(BaseModel):
     """
     email: EmailStr = Field(..., description="Email del usuario")
 
+    # Las solicitudes se validan una vez y solo se leen; las subclases lo heredan
+    model_config = ConfigDict(frozen=True)
+
+    @field_validator('email')
+    def normalize_email(cls, v: str) -> str:
+        """
+        Normaliza el email a minúsculas para que las búsquedas usen el índice.
+        
+        Args:
+            v (str): Email a normalizar
+            
+        Returns:
+            str: Email en minúsculas
+        """
+        return v.lower()
+
 class UserLogin(UserAuthBase):
     """
     Schema para la solicitud de login.
@@ -81,10 +101,16 @@ class UserRegister(UserAuthBase):
     )
     rol: str = Field(
         ...,
-        pattern='^(admin|usuario|vendedor)$',
         description="Rol del usuario (admin, usuario, vendedor)"
     )
 
+    @field_validator('rol')
+    def validate_rol(cls, v: str) -> str:
+        """Valida que el rol sea uno de los permitidos."""
+        if v not in _ROLES_VALIDOS:
+            raise ValueError('Rol debe ser uno de: admin, usuario, vendedor')
+        return v
+
     @field_validator('password')
     def validate_password_strength(cls, v: str) -> str:
         """
@@ -99,15 +125,29 @@ class UserRegister(UserAuthBase):
         Raises:
             ValueError: Si la contraseña no cumple con los requisitos
         """
-        if not any(char.isupper() for char in v):
+        # Una sola pasada que clasifica cada carácter y se detiene al encontrar
+        # las cuatro clases; mayúsculas, minúsculas y números siempre son
+        # alfanuméricos, por lo que el orden de las comprobaciones no pierde casos
+        mayuscula = minuscula = numero = especial = False
+        for char in v:
+            if char.isupper():
+                mayuscula = True
+            elif char.islower():
+                minuscula = True
+            elif char.isdigit():
+                numero = True
+            elif not char.isalnum():
+                especial = True
+            if mayuscula and minuscula and numero and especial:
+                return v
+
+        if not mayuscula:
             raise ValueError('La contraseña debe contener al menos una mayúscula')
-        if not any(char.islower() for char in v):
+        if not minuscula:
             raise ValueError('La contraseña debe contener al menos una minúscula')
-        if not any(char.isdigit() for char in v):
+        if not numero:
             raise ValueError('La contraseña debe contener al menos un número')
-        if not any(not char.isalnum() for char in v):
-            raise ValueError('La contraseña debe contener al menos un carácter especial')
-        return v
+        raise ValueError('La contraseña debe contener al menos un carácter especial')
 
     @model_validator(mode='after')
     def passwords_match(self) -> 'UserRegister':
@@ -143,9 +183,7 @@ class UserResponse(BaseModel):
     activo: bool
     fecha_registro: datetime
 
-    class Config:
-        """Configuración del modelo Pydantic."""
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
 
 class PasswordChange(BaseModel):
     """
@@ -160,6 +198,8 @@ class PasswordChange(BaseModel):
     new_password: str = Field(..., min_length=8)
     new_password_confirm: str = Field(..., min_length=8)
 
+    model_config = ConfigDict(frozen=True)
+
     @model_validator(mode='after')
     def passwords_match(self) -> 'PasswordChange':
         """
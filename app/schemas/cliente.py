@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, TypeAdapter, field_validator
 from decimal import Decimal
 
 # Cliente Schemas
@@ -12,6 +12,11 @@ class ClienteBase(BaseModel):
     email: EmailStr = Field(..., description="Correo electrónico del cliente")
     telefono: Optional[str] = Field(None, max_length=20, description="Número de teléfono del cliente")
 
+    @field_validator('email')
+    def normalize_email(cls, v: str) -> str:
+        """Normaliza el email a minúsculas para que las búsquedas usen el índice"""
+        return v.lower()
+
 class ClienteCreate(ClienteBase):
     """
     Esquema para crear un nuevo Cliente.
@@ -19,6 +24,9 @@ class ClienteCreate(ClienteBase):
     """
     pass
 
+# Adaptador creado una sola vez para volcar listas completas en una sola llamada
+ClienteCreateList = TypeAdapter(List[ClienteCreate])
+
 class ClienteUpdate(BaseModel):
     """
     Esquema para actualizar un Cliente.
@@ -29,6 +37,11 @@ class ClienteUpdate(BaseModel):
     telefono: Optional[str] = Field(None, max_length=20)
     activo: Optional[bool] = None
 
+    @field_validator('email')
+    def normalize_email(cls, v: Optional[str]) -> Optional[str]:
+        """Normaliza el email a minúsculas, igual que al crear el cliente"""
+        return v.lower() if v is not None else v
+
 class Cliente(ClienteBase):
     """
     Esquema completo de Cliente que incluye todos los campos.
@@ -38,9 +51,4 @@ class Cliente(ClienteBase):
     fecha_registro: datetime
     activo: bool
 
-    class Config:
-        """Configuración del esquema para permitir ORM"""
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class ProductoBase(BaseModel):
     nombre: str
@@ -12,6 +12,9 @@ class ProductoBase(BaseModel):
 class ProductoCreate(ProductoBase):
     pass
 
+# Adaptador creado una sola vez para volcar listas completas en una sola llamada
+ProductoCreateList = TypeAdapter(List[ProductoCreate])
+
 class ProductoUpdate(BaseModel):
     nombre: Optional[str] = None
     descripcion: Optional[str] = None
@@ -26,8 +29,7 @@ class ProductoInDB(ProductoBase):
     ventas_ultimo_mes: int
     baja_rotacion: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
 
 class Producto(ProductoInDB):
     pass
\ No newline at end of file
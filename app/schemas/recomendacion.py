@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from decimal import Decimal
 
 class RecomendacionBase(BaseModel):
@@ -35,12 +35,7 @@ class Recomendacion(RecomendacionBase):
     fecha_recomendacion: datetime
     efectiva: bool
 
-    class Config:
-        """Configuración del esquema para permitir ORM"""
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
 class RecomendacionRequest(BaseModel):
     """
     Modelo de datos para la solicitud de recomendaciones.
@@ -52,4 +47,6 @@ class RecomendacionRequest(BaseModel):
     """
     cliente_id: int = Field(..., gt=0, description="ID del cliente")
     producto_id: Optional[int] = Field(None, gt=0, description="ID del producto semilla")
-    limit: Optional[int] = Field(5, ge=1, le=10, description="Número máximo de recomendaciones")
\ No newline at end of file
+    limit: Optional[int] = Field(5, ge=1, le=10, description="Número máximo de recomendaciones")
+
+    model_config = ConfigDict(frozen=True)
\ No newline at end of file
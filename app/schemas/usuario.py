@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
 from datetime import datetime
 from typing import Optional
 
@@ -7,6 +7,11 @@ class UsuarioBase(BaseModel):
     email: EmailStr
     rol: str
 
+    @field_validator('email')
+    def normalize_email(cls, v: str) -> str:
+        """Normaliza el email a minúsculas para que las búsquedas usen el índice"""
+        return v.lower()
+
 class UsuarioCreate(UsuarioBase):
     password: str
 
@@ -17,13 +22,17 @@ class UsuarioUpdate(BaseModel):
     rol: Optional[str] = None
     activo: Optional[bool] = None
 
+    @field_validator('email')
+    def normalize_email(cls, v: Optional[str]) -> Optional[str]:
+        """Normaliza el email a minúsculas, igual que al crear el usuario"""
+        return v.lower() if v is not None else v
+
 class UsuarioInDB(UsuarioBase):
     id: int
     fecha_registro: datetime
     activo: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
 
 class Usuario(UsuarioInDB):
     pass
\ No newline at end of file
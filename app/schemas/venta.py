@@ -1,8 +1,22 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from decimal import Decimal
 
+# Estados permitidos y mensaje de error, construidos una sola vez
+_ESTADOS_VALIDOS = frozenset(('pendiente', 'completada', 'cancelada', 'en_proceso'))
+_ESTADOS_ERROR = f'Estado debe ser uno de: {", ".join(sorted(_ESTADOS_VALIDOS))}'
+
+def _normalizar_estado(v: str) -> str:
+    """Retorna el estado en minúsculas o lanza ValueError si no es válido."""
+    estado = v.lower()
+    if estado not in _ESTADOS_VALIDOS:
+        raise ValueError(_ESTADOS_ERROR)
+    return estado
+
+# Estados aceptados al crear una venta (sin normalizar mayúsculas)
+_ESTADOS_CREACION = frozenset(('completada', 'pendiente', 'cancelada'))
+
 class VentaBase(BaseModel):
     """
     Esquema base para Venta que contiene los campos comunes.
@@ -11,28 +25,36 @@ class VentaBase(BaseModel):
     total: Decimal = Field(..., ge=0, description="Monto total de la venta")
     estado: str = Field(..., description="Estado actual de la venta")
 
-    @validator('estado')
+    @field_validator('estado')
     def validate_estado(cls, v):
         """Valida que el estado sea uno de los permitidos"""
-        estados_validos = {'pendiente', 'completada', 'cancelada', 'en_proceso'}
-        if v.lower() not in estados_validos:
-            raise ValueError(f'Estado debe ser uno de: {", ".join(estados_validos)}')
-        return v.lower()
+        return _normalizar_estado(v)
 class DetalleVentaCreate(BaseModel):
     producto_id: int
     cantidad: int
     precio_unitario: float
 
+    model_config = ConfigDict(frozen=True)
+
 class VentaCreate(BaseModel):
     """
     Schema para crear una nueva venta
     """
     cliente_id: int
     total: float
-    estado: str = Field(..., pattern='^(completada|pendiente|cancelada)$')
+    estado: str
     fecha_venta: Optional[datetime] = None
     detalles_venta: List[DetalleVentaCreate]
 
+    model_config = ConfigDict(frozen=True)
+
+    @field_validator('estado')
+    def validate_estado(cls, v):
+        """Valida que el estado sea uno de los permitidos al crear la venta"""
+        if v not in _ESTADOS_CREACION:
+            raise ValueError('Estado debe ser uno de: cancelada, completada, pendiente')
+        return v
+
 
 
 class VentaUpdate(BaseModel):
@@ -43,13 +65,10 @@ class VentaUpdate(BaseModel):
     total: Optional[Decimal] = Field(None, ge=0)
     estado: Optional[str] = None
 
-    @validator('estado')
+    @field_validator('estado')
     def validate_estado(cls, v):
         if v is not None:
-            estados_validos = {'pendiente', 'completada', 'cancelada', 'en_proceso'}
-            if v.lower() not in estados_validos:
-                raise ValueError(f'Estado debe ser uno de: {", ".join(estados_validos)}')
-            return v.lower()
+            return _normalizar_estado(v)
         return v
 
 class Venta(VentaBase):
@@ -60,10 +79,4 @@ class Venta(VentaBase):
     id: int
     fecha_venta: datetime
 
-    class Config:
-        """Configuración del esquema para permitir ORM"""
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-            Decimal: lambda v: str(v)
-        }
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, revalidate_instances='never')
\ No newline at end of file
@@ -1,7 +1,10 @@
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple, Union
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from collections import defaultdict
+from sqlalchemy import func, desc, exists, insert, or_, select
+from cachetools import TTLCache
+import threading
+import numpy as np
 
 from app.models.producto import Producto
 from app.models.cliente import Cliente
@@ -9,12 +12,57 @@ from app.models.venta import Venta
 from app.models.detalle_venta import DetalleVenta
 from app.models.recomendacion import Recomendacion
 
+# Caché en proceso de las preferencias por cliente y de los productos comprados
+# juntos, que se recalculan en cada petición de recomendaciones. Las ventas
+# nuevas las invalidan y el TTL acota lo que pueden quedar desactualizadas
+# frente a ventas registradas desde otro proceso.
+RECOMENDACION_CACHE_TTL_SECONDS = 60
+_preferences_cache: TTLCache = TTLCache(maxsize=1024, ttl=RECOMENDACION_CACHE_TTL_SECONDS)
+_bought_together_cache: TTLCache = TTLCache(maxsize=1024, ttl=RECOMENDACION_CACHE_TTL_SECONDS)
+_recomendacion_cache_lock = threading.Lock()
+
+def invalidate_recommendation_cache(cliente_id: int) -> None:
+    """
+    Descarta los datos cacheados que dependen del historial de ventas.
+
+    Una venta cambia las preferencias de su cliente y puede cambiar los
+    productos comprados juntos de cualquier producto, por lo que esta última
+    caché se vacía por completo.
+
+    Args:
+        cliente_id (int): ID del cliente que realizó la venta
+    """
+    with _recomendacion_cache_lock:
+        _preferences_cache.pop(cliente_id, None)
+        _bought_together_cache.clear()
+
 class RecomendacionService:
     """
     Servicio para generar recomendaciones de productos basadas en el historial de compras
     y comportamiento de los clientes.
     """
 
+    # Configuración inmutable compartida por todas las instancias
+    MIN_SCORE = 0.1
+    MAX_RECOMMENDATIONS = 10
+
+    # Pesos de cada componente del score, compartidos por el cálculo escalar
+    # y el vectorizado para que ambos den siempre el mismo resultado
+    WEIGHT_CATEGORIA = 0.4
+    WEIGHT_VENTAS = 0.3
+    WEIGHT_BOUGHT_TOGETHER = 0.3
+
+    # Columnas de los productos candidatos: se cargan como filas ligeras en
+    # lugar de instancias ORM, que no se modifican y solo se leen para puntuar
+    _CANDIDATE_COLUMNS = (
+        Producto.id,
+        Producto.nombre,
+        Producto.categoria,
+        Producto.precio,
+        Producto.ventas_ultimo_mes,
+        Producto.baja_rotacion
+    )
+
     def __init__(self, db: Session):
         """
         Inicializa el servicio de recomendaciones.
@@ -23,8 +71,6 @@ class RecomendacionService:
             db (Session): Sesión de base de datos SQLAlchemy.
         """
         self.db = db
-        self.MIN_SCORE = 0.1
-        self.MAX_RECOMMENDATIONS = 10
 
     def _get_client_purchase_history(self, cliente_id: int) -> List[Tuple[int, str]]:
         """
@@ -55,20 +101,31 @@ class RecomendacionService:
         Returns:
             Dict[str, float]: Diccionario de categorías y sus scores de preferencia
         """
-        category_counts = defaultdict(int)
-        purchases = self._get_client_purchase_history(cliente_id)
-        total_purchases = len(purchases)
-
-        if total_purchases == 0:
-            return {}
-
-        for _, category in purchases:
-            category_counts[category] += 1
+        with _recomendacion_cache_lock:
+            cached = _preferences_cache.get(cliente_id)
+        if cached is not None:
+            return dict(cached)
+
+        # El histograma por categoría se calcula en la base de datos: se
+        # transfiere una fila por categoría en lugar de una por producto comprado
+        category_counts = dict(
+            self.db.query(Producto.categoria, func.count(func.distinct(Producto.id)))
+            .join(DetalleVenta)
+            .join(Venta)
+            .filter(Venta.cliente_id == cliente_id)
+            .group_by(Producto.categoria)
+            .all()
+        )
+        total_purchases = sum(category_counts.values())
 
-        return {
+        preferences = {
             category: count / total_purchases 
             for category, count in category_counts.items()
-        }
+        } if total_purchases else {}
+
+        with _recomendacion_cache_lock:
+            _preferences_cache[cliente_id] = preferences
+        return dict(preferences)
 
     def _get_frequently_bought_together(self, producto_id: int) -> List[Tuple[int, float]]:
         """
@@ -80,6 +137,11 @@ class RecomendacionService:
         Returns:
             List[Tuple[int, float]]: Lista de tuplas (producto_id, score)
         """
+        with _recomendacion_cache_lock:
+            cached = _bought_together_cache.get(producto_id)
+        if cached is not None:
+            return list(cached)
+
         # Obtener ventas que contienen el producto semilla
         ventas_con_producto = (
             self.db.query(Venta.id)
@@ -101,15 +163,20 @@ class RecomendacionService:
             .all()
         )
 
-        if not productos_relacionados:
-            return []
+        if productos_relacionados:
+            # La consulta ya ordena por frecuencia descendente: el máximo es el primero
+            max_frequency = productos_relacionados[0][1]
+            scores = tuple((prod_id, freq/max_frequency) for prod_id, freq in productos_relacionados)
+        else:
+            scores = ()
 
-        max_frequency = max(freq for _, freq in productos_relacionados)
-        return [(prod_id, freq/max_frequency) for prod_id, freq in productos_relacionados]
+        with _recomendacion_cache_lock:
+            _bought_together_cache[producto_id] = scores
+        return list(scores)
 
     def _calculate_recommendation_score(
         self, 
-        producto: Producto, 
+        producto: Union[Producto, Row], 
         categoria_actual: Optional[str] = None,
         categoria_preferences: Optional[Dict[str, float]] = None,
         bought_together_scores: Optional[Dict[int, float]] = None
@@ -118,7 +185,8 @@ class RecomendacionService:
         Calcula el score de recomendación para un producto.
 
         Args:
-            producto (Producto): Producto a evaluar
+            producto (Union[Producto, Row]): Producto a evaluar; basta con que
+                exponga id, categoria y ventas_ultimo_mes, como las filas candidatas
             categoria_actual (Optional[str]): Categoría del producto semilla
             categoria_preferences (Optional[Dict[str, float]]): Preferencias de categoría
             bought_together_scores (Optional[Dict[int, float]]): Scores de productos comprados juntos
@@ -127,28 +195,75 @@ class RecomendacionService:
             float: Score de recomendación entre 0 y 1
         """
         score = 0.0
-        weights = {
-            'categoria': 0.4,
-            'ventas': 0.3,
-            'bought_together': 0.3
-        }
 
         # Score por categoría
         if categoria_actual and producto.categoria == categoria_actual:
-            score += weights['categoria']
+            score += self.WEIGHT_CATEGORIA
         elif categoria_preferences and producto.categoria in categoria_preferences:
-            score += weights['categoria'] * categoria_preferences[producto.categoria]
+            score += self.WEIGHT_CATEGORIA * categoria_preferences[producto.categoria]
 
         # Score por ventas recientes
         if producto.ventas_ultimo_mes > 0:
-            score += weights['ventas'] * min(producto.ventas_ultimo_mes / 100, 1)
+            score += self.WEIGHT_VENTAS * min(producto.ventas_ultimo_mes / 100, 1)
 
         # Score por productos comprados juntos
         if bought_together_scores and producto.id in bought_together_scores:
-            score += weights['bought_together'] * bought_together_scores[producto.id]
+            score += self.WEIGHT_BOUGHT_TOGETHER * bought_together_scores[producto.id]
 
         return max(min(score, 1.0), self.MIN_SCORE)
 
+    def _score_candidates(
+        self,
+        productos: Sequence[Row],
+        categoria_actual: Optional[str] = None,
+        categoria_preferences: Optional[Dict[str, float]] = None,
+        bought_together_scores: Optional[Dict[int, float]] = None
+    ) -> np.ndarray:
+        """
+        Calcula los scores de todos los productos candidatos en una sola operación vectorizada.
+
+        Equivale a aplicar _calculate_recommendation_score a cada producto, pero la
+        aritmética se hace sobre arreglos de NumPy en lugar de un bucle de Python.
+
+        Args:
+            productos (Sequence[Row]): Filas de los productos candidatos
+            categoria_actual (Optional[str]): Categoría del producto semilla
+            categoria_preferences (Optional[Dict[str, float]]): Preferencias de categoría
+            bought_together_scores (Optional[Dict[int, float]]): Scores de productos comprados juntos
+
+        Returns:
+            np.ndarray: Scores entre MIN_SCORE y 1, en el mismo orden que productos
+        """
+        n = len(productos)
+        categoria_preferences = categoria_preferences or {}
+        bought_together_scores = bought_together_scores or {}
+
+        # Peso de categoría resuelto una vez por categoría distinta
+        categorias = [p.categoria for p in productos]
+        peso_por_categoria = {
+            categoria: 1.0 if categoria_actual and categoria == categoria_actual
+            else categoria_preferences.get(categoria, 0.0)
+            for categoria in set(categorias)
+        }
+        pesos_categoria = np.fromiter(
+            (peso_por_categoria[c] for c in categorias), dtype=np.float64, count=n
+        )
+        ventas = np.fromiter(
+            (p.ventas_ultimo_mes or 0 for p in productos), dtype=np.float64, count=n
+        )
+        bought_together = np.fromiter(
+            (bought_together_scores.get(p.id, 0.0) for p in productos), dtype=np.float64, count=n
+        )
+
+        # float64, como los floats de Python del cálculo escalar: los scores se
+        # devuelven en la API y se guardan en recomendaciones.score tal cual
+        scores = (
+            self.WEIGHT_CATEGORIA * pesos_categoria
+            + self.WEIGHT_VENTAS * np.clip(ventas / 100, 0.0, 1.0)
+            + self.WEIGHT_BOUGHT_TOGETHER * bought_together
+        )
+        return np.clip(scores, self.MIN_SCORE, 1.0, out=scores)
+
     def generar_recomendaciones(
         self,
         cliente_id: int,
@@ -171,8 +286,7 @@ class RecomendacionService:
         """
         try:
             # Verificar que el cliente existe
-            cliente = self.db.query(Cliente).filter(Cliente.id == cliente_id).first()
-            if not cliente:
+            if not self.db.execute(select(exists().where(Cliente.id == cliente_id))).scalar():
                 raise ValueError(f"Cliente {cliente_id} no encontrado")
 
             # Variables para el cálculo de scores
@@ -182,7 +296,11 @@ class RecomendacionService:
 
             # Si hay producto semilla, obtener su información
             if producto_id:
-                producto_semilla = self.db.query(Producto).filter(Producto.id == producto_id).first()
+                # Solo se necesita la categoría; se lee como fila porque puede ser
+                # NULL y scalar() no distinguiría ese caso de un producto inexistente
+                producto_semilla = self.db.execute(
+                    select(Producto.categoria).where(Producto.id == producto_id)
+                ).first()
                 if not producto_semilla:
                     raise ValueError(f"Producto {producto_id} no encontrado")
                 
@@ -190,46 +308,74 @@ class RecomendacionService:
                 productos_relacionados = self._get_frequently_bought_together(producto_id)
                 bought_together_scores = dict(productos_relacionados)
 
-            # Obtener productos candidatos
-            productos_query = self.db.query(Producto).filter(Producto.stock > 0)
+            # Obtener productos candidatos acotados en la base de datos. Fuera de
+            # los productos comprados juntos, el score de un producto solo depende
+            # de su categoría y crece con ventas_ultimo_mes, así que basta con los
+            # k más vendidos de cada categoría: el resultado es el mismo que al
+            # puntuar todo el catálogo, pero sin traerlo completo a Python
+            k = min(limit, self.MAX_RECOMMENDATIONS)
+            candidatos = (
+                select(
+                    *self._CANDIDATE_COLUMNS,
+                    func.row_number().over(
+                        partition_by=Producto.categoria,
+                        order_by=func.coalesce(Producto.ventas_ultimo_mes, 0).desc()
+                    ).label('rango')
+                )
+                .where(Producto.stock > 0)
+            )
             if producto_id:
-                productos_query = productos_query.filter(Producto.id != producto_id)
-
-            productos = productos_query.all()
+                candidatos = candidatos.where(Producto.id != producto_id)
+            candidatos = candidatos.subquery()
+
+            seleccion = candidatos.c.rango <= k
+            if bought_together_scores:
+                seleccion = or_(seleccion, candidatos.c.id.in_(bought_together_scores))
+            productos_stmt = select(
+                *(candidatos.c[column.key] for column in self._CANDIDATE_COLUMNS)
+            ).where(seleccion)
+
+            productos = self.db.execute(productos_stmt).all()
+
+            # Calcular scores y seleccionar el top-k sin ordenar todos los candidatos
+            scores = self._score_candidates(
+                productos,
+                categoria_actual,
+                categoria_preferences,
+                bought_together_scores
+            )
+            k = min(k, len(productos))
+            top = np.argpartition(-scores, k - 1)[:k] if k else np.empty(0, dtype=np.intp)
+            top = top[np.argsort(-scores[top], kind='stable')]
 
-            # Calcular scores y ordenar recomendaciones
             recomendaciones = []
-            for producto in productos:
-                score = self._calculate_recommendation_score(
-                    producto,
-                    categoria_actual,
-                    categoria_preferences,
-                    bought_together_scores
-                )
-
+            for i in top:
+                producto = productos[i]
                 recomendaciones.append({
                     'producto_id': producto.id,
                     'nombre': producto.nombre,
                     'categoria': producto.categoria,
                     'precio': producto.precio,
-                    'score': score,
+                    'score': float(scores[i]),
                     'baja_rotacion': producto.baja_rotacion
                 })
 
-            # Ordenar por score y limitar resultados
-            recomendaciones.sort(key=lambda x: x['score'], reverse=True)
-            recomendaciones = recomendaciones[:min(limit, self.MAX_RECOMMENDATIONS)]
-
-            # Registrar recomendaciones en la base de datos
-            for rec in recomendaciones:
-                nueva_recomendacion = Recomendacion(
-                    cliente_id=cliente_id,
-                    producto_recomendado_id=rec['producto_id'],
-                    score=rec['score'],
-                    efectiva=False
+            # Registrar recomendaciones en la base de datos con un solo INSERT
+            # executemany, sin construir instancias ORM que no se vuelven a usar
+            if recomendaciones:
+                self.db.execute(
+                    insert(Recomendacion),
+                    [
+                        {
+                            'cliente_id': cliente_id,
+                            'producto_recomendado_id': rec['producto_id'],
+                            'score': rec['score'],
+                            'efectiva': False
+                        }
+                        for rec in recomendaciones
+                    ]
                 )
-                self.db.add(nueva_recomendacion)
-            
+
             self.db.commit()
 
             return recomendaciones
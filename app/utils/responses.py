@@ -0,0 +1,83 @@
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Type, TypeVar
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# Número de filas serializadas por fragmento de la respuesta
+STREAM_BATCH_SIZE = 500
+
+class ORJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada con orjson.
+
+    Se declara solo en los endpoints que retornan diccionarios sin
+    response_model: los que tienen modelo ya se serializan directamente a
+    bytes con Pydantic, y fijar otra clase de respuesta desactivaría esa vía.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+def from_db(schema: Type[SchemaT], obj: Any) -> SchemaT:
+    """
+    Construye un esquema de respuesta a partir de un objeto ORM sin validarlo.
+
+    Los datos ya fueron validados al escribirse en la base de datos, por lo que
+    model_construct evita la validación con from_attributes campo por campo.
+    Solo debe usarse con esquemas cuyos tipos coinciden con los de las columnas
+    (p. ej. no con Venta, que declara total como Decimal sobre una columna Float).
+
+    Args:
+        schema (Type[SchemaT]): Esquema de respuesta
+        obj (Any): Objeto ORM con un atributo por cada campo del esquema
+
+    Returns:
+        SchemaT: Instancia del esquema con los valores del objeto
+    """
+    return schema.model_construct(**{name: getattr(obj, name) for name in schema.model_fields})
+
+def _iter_json_array(rows: Sequence[Mapping], batch_size: int) -> Iterator[bytes]:
+    """
+    Serializa las filas como un arreglo JSON, un lote a la vez.
+
+    Args:
+        rows (Sequence[Mapping]): Filas a serializar
+        batch_size (int): Número de filas por fragmento
+
+    Yields:
+        bytes: Fragmentos del arreglo JSON
+    """
+    yield b"["
+    for start in range(0, len(rows), batch_size):
+        if start:
+            yield b","
+        # orjson serializa el lote completo en C; se quitan los corchetes del arreglo
+        yield orjson.dumps([dict(row) for row in rows[start:start + batch_size]])[1:-1]
+    yield b"]"
+
+def stream_json_rows(
+    rows: Sequence[Mapping],
+    headers: Optional[Dict[str, str]] = None,
+    batch_size: int = STREAM_BATCH_SIZE
+) -> StreamingResponse:
+    """
+    Construye una respuesta JSON en streaming a partir de filas de la base de datos.
+
+    Se usa en los listados cuyas columnas ya coinciden con el esquema de respuesta,
+    evitando la validación de Pydantic y la codificación completa del cuerpo en memoria.
+
+    Args:
+        rows (Sequence[Mapping]): Filas obtenidas con Result.mappings()
+        headers (Optional[Dict[str, str]]): Cabeceras adicionales de la respuesta
+        batch_size (int): Número de filas por fragmento
+
+    Returns:
+        StreamingResponse: Respuesta con el arreglo JSON de las filas
+    """
+    return StreamingResponse(
+        _iter_json_array(rows, batch_size),
+        media_type="application/json",
+        headers=headers
+    )
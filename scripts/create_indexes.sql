@@ -0,0 +1,32 @@
+-- Índices declarados en los modelos que Base.metadata.create_all no crea en bases
+-- de datos ya desplegadas (create_all omite las tablas existentes).
+--
+-- Uso (psql ejecuta cada sentencia en autocommit, requisito de CONCURRENTLY):
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f scripts/create_indexes.sql
+--
+-- Si una creación concurrente falla, el índice queda marcado como INVALID y
+-- IF NOT EXISTS lo omitiría en la siguiente ejecución: eliminarlo con
+-- DROP INDEX CONCURRENTLY <nombre> antes de reintentar.
+--
+-- Los índices únicos sobre lower(email) fallan si ya existen emails que solo
+-- difieren en mayúsculas; localizarlos antes con:
+--   SELECT lower(email), count(*) FROM usuarios GROUP BY 1 HAVING count(*) > 1;
+--   SELECT lower(email), count(*) FROM clientes GROUP BY 1 HAVING count(*) > 1;
+
+-- Búsquedas de email sin distinguir mayúsculas
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_usuarios_email_lower
+    ON usuarios (lower(email));
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_clientes_email_lower
+    ON clientes (lower(email));
+
+-- Paginación por cursor de los listados de ventas, general y por cliente
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ventas_fecha_venta_id
+    ON ventas (fecha_venta DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ventas_cliente_fecha_id
+    ON ventas (cliente_id, fecha_venta DESC, id DESC);
+
+-- Detalles por venta y ventas por producto
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_detalles_venta_venta_producto
+    ON detalles_venta (venta_id, producto_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_detalles_venta_producto_venta
+    ON detalles_venta (producto_id, venta_id);
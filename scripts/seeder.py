@@ -1,28 +1,19 @@
 import httpx
+import orjson
 import random
 from faker import Faker
-from typing import List, Dict
+from typing import Callable, List, Dict
 import asyncio
 from datetime import datetime, timedelta
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-import sys
-
-# Añadir el directorio raíz del proyecto al PYTHONPATH
-project_root = Path(__file__).parent.parent
-sys.path.append(str(project_root))
-
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('seeder.log'),
-        logging.StreamHandler()
-    ]
-)
+import queue
+
 logger = logging.getLogger(__name__)
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 class DataSeeder:
     """
     Clase para generar y enviar datos ficticios a los endpoints de la API.
@@ -33,6 +24,14 @@ class DataSeeder:
         client (httpx.AsyncClient): Cliente HTTP asíncrono
     """
 
+    # Registros enviados por petición a los endpoints de creación masiva
+    BULK_BATCH_SIZE = 1000
+    # Peticiones en vuelo como máximo; por debajo del pool de base de datos de la
+    # API para que el seeding no acapare las conexiones de un worker
+    MAX_CONCURRENT_REQUESTS = 16
+    # Ventas pendientes en la cola de los workers; acota la memoria con muchos clientes
+    VENTAS_QUEUE_SIZE = 256
+
     def __init__(self, base_url: str = "http://localhost:8000"):
         """
         Inicializa el generador de datos.
@@ -42,7 +41,21 @@ class DataSeeder:
         """
         self.base_url = base_url
         self.faker = Faker(['es_ES'])  # Usar locale español
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Un único pool para todo el seeding: las conexiones keep-alive se reutilizan
+        # entre peticiones. Los límites se fijan en el transporte porque httpx ignora
+        # los del cliente cuando se le pasa uno; retries reintenta solo la conexión
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0),
+            transport=httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=300
+                ),
+                retries=2
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
         
         self.categorias = [
             "Electrónica", "Ropa", "Hogar", "Deportes", "Libros",
@@ -53,6 +66,30 @@ class DataSeeder:
         """Cierra el cliente HTTP."""
         await self.client.aclose()
 
+    async def _post(self, url: str, payload) -> httpx.Response:
+        """
+        Envía un POST respetando el límite de peticiones concurrentes.
+
+        Args:
+            url (str): URL completa del endpoint
+            payload: Cuerpo JSON de la petición
+
+        Returns:
+            httpx.Response: Respuesta de la API
+        """
+        # orjson serializa en C; con json= httpx usaría el módulo json estándar
+        content = orjson.dumps(payload)
+        async with self._semaphore:
+            return await self.client.post(url, content=content, headers=_JSON_HEADERS)
+
+    async def __aenter__(self) -> "DataSeeder":
+        """Permite usar el seeder con async with; el cliente ya está creado."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Cierra el cliente HTTP una sola vez al salir del bloque."""
+        await self.close()
+
     async def get_existing_productos(self) -> List[Dict]:
         """
         Obtiene los productos existentes en la base de datos.
@@ -79,20 +116,12 @@ class DataSeeder:
             httpx.HTTPError: Si hay un error en la petición HTTP
         """
         try:
-            usuario_data = {
-                "username": self.faker.user_name(),
-                "email": self.faker.email(),
-                "password": "password123",  # En un caso real, usar contraseñas seguras
-                "rol": random.choice(["admin", "vendedor", "supervisor"]),
-            }
+            usuario_data = self.generate_usuario_data("password123")  # En un caso real, usar contraseñas seguras
 
-            response = await self.client.post(
-                f"{self.base_url}/usuarios/",
-                json=usuario_data
-            )
+            response = await self._post(f"{self.base_url}/usuarios/", usuario_data)
             response.raise_for_status()
             usuario_creado = response.json()
-            logger.info(f"Usuario creado: {usuario_creado['username']}")
+            logger.debug("Usuario creado: %s", usuario_creado['username'])
             return usuario_creado
 
         except httpx.HTTPError as e:
@@ -110,23 +139,12 @@ class DataSeeder:
             httpx.HTTPError: Si hay un error en la petición HTTP
         """
         try:
-            producto_data = {
-                "nombre": self.faker.catch_phrase(),
-                "descripcion": self.faker.text(max_nb_chars=200),
-                "precio": round(random.uniform(10.0, 1000.0), 2),
-                "stock": random.randint(0, 100),
-                "categoria": random.choice(self.categorias),
-                "ventas_ultimo_mes": random.randint(0, 50),
-                "baja_rotacion": random.choice([True, False])
-            }
+            producto_data = self._generate_producto_data()
 
-            response = await self.client.post(
-                f"{self.base_url}/productos/",
-                json=producto_data
-            )
+            response = await self._post(f"{self.base_url}/productos/", producto_data)
             response.raise_for_status()
             producto_creado = response.json()
-            logger.info(f"Producto creado: {producto_creado['nombre']}")
+            logger.debug("Producto creado: %s", producto_creado['nombre'])
             return producto_creado
 
         except httpx.HTTPError as e:
@@ -141,24 +159,152 @@ class DataSeeder:
             Dict: Datos del cliente creado
         """
         try:
-            cliente_data = {
-                "nombre": self.faker.name(),
-                "email": self.faker.email(),
-                "telefono": self.faker.phone_number(),
-            }
+            cliente_data = self._generate_cliente_data()
 
-            response = await self.client.post(
-                f"{self.base_url}/clientes/",
-                json=cliente_data
-            )
+            response = await self._post(f"{self.base_url}/clientes/", cliente_data)
             response.raise_for_status()
             cliente_creado = response.json()
-            logger.info(f"Cliente creado: {cliente_creado['nombre']}")
+            logger.debug("Cliente creado: %s", cliente_creado['nombre'])
             return cliente_creado
         except httpx.HTTPError as e:
             logger.error(f"Error creando cliente: {str(e)}")
             raise
 
+    def generate_usuario_data(self, password: str) -> Dict:
+        """
+        Genera los datos de un usuario ficticio.
+
+        Args:
+            password (str): Contraseña (o hash ya calculado) a asignar al usuario
+
+        Returns:
+            Dict: Datos del usuario
+        """
+        return {
+            "username": self.faker.unique.user_name(),
+            "email": self.faker.unique.email(),
+            "password": password,
+            "rol": random.choice(["admin", "vendedor", "supervisor"]),
+        }
+
+    def _generate_producto_data(self) -> Dict:
+        """
+        Genera los datos de un producto ficticio.
+
+        Returns:
+            Dict: Datos del producto
+        """
+        return {
+            "nombre": self.faker.catch_phrase(),
+            "descripcion": self.faker.text(max_nb_chars=200),
+            "precio": round(random.uniform(10.0, 1000.0), 2),
+            "stock": random.randint(0, 100),
+            "categoria": random.choice(self.categorias),
+            "ventas_ultimo_mes": random.randint(0, 50),
+            "baja_rotacion": random.choice([True, False])
+        }
+
+    def _generate_cliente_data(self) -> Dict:
+        """
+        Genera los datos de un cliente ficticio.
+
+        Returns:
+            Dict: Datos del cliente
+        """
+        return {
+            "nombre": self.faker.name(),
+            # Faker repite emails con facilidad; el endpoint masivo rechaza el lote completo si hay duplicados
+            "email": self.faker.unique.email(),
+            "telefono": self.faker.phone_number(),
+        }
+
+    @staticmethod
+    def _generate_many(generator: Callable[[], Dict], cantidad: int) -> List[Dict]:
+        """
+        Genera varios registros ficticios con el generador indicado.
+
+        Faker es CPU puro en Python; los llamadores lo ejecutan con
+        asyncio.to_thread para no bloquear el event loop, que al lanzar el
+        seeding desde la API es el mismo que atiende las peticiones.
+
+        Args:
+            generator (Callable[[], Dict]): Función que genera un registro
+            cantidad (int): Número de registros a generar
+
+        Returns:
+            List[Dict]: Registros generados
+        """
+        return [generator() for _ in range(cantidad)]
+
+    async def _post_bulk(self, path: str, items: List[Dict]) -> List[Dict]:
+        """
+        Envía los registros a un endpoint de creación masiva en lotes concurrentes de BULK_BATCH_SIZE.
+
+        Args:
+            path (str): Ruta del endpoint masivo
+            items (List[Dict]): Registros a crear
+
+        Returns:
+            List[Dict]: Registros creados
+
+        Raises:
+            httpx.HTTPError: Si hay un error en la petición HTTP
+        """
+        async def enviar_lote(lote: List[Dict]) -> List[Dict]:
+            response = await self._post(f"{self.base_url}{path}", lote)
+            response.raise_for_status()
+            return response.json()
+
+        # Los lotes se envían en paralelo (acotados por el semáforo de _post);
+        # gather conserva su orden en el resultado
+        lotes = await asyncio.gather(*(
+            enviar_lote(items[start:start + self.BULK_BATCH_SIZE])
+            for start in range(0, len(items), self.BULK_BATCH_SIZE)
+        ))
+        return [creado for lote in lotes for creado in lote]
+
+    async def create_productos_bulk(self, num_productos: int) -> List[Dict]:
+        """
+        Crea varios productos ficticios con el endpoint de creación masiva.
+
+        Args:
+            num_productos (int): Número de productos a crear
+
+        Returns:
+            List[Dict]: Productos creados
+        """
+        try:
+            productos = await asyncio.to_thread(
+                self._generate_many, self._generate_producto_data, num_productos
+            )
+            productos_creados = await self._post_bulk("/productos/bulk/", productos)
+            logger.info(f"Productos creados: {len(productos_creados)}")
+            return productos_creados
+        except httpx.HTTPError as e:
+            logger.error(f"Error creando productos: {str(e)}")
+            raise
+
+    async def create_clientes_bulk(self, num_clientes: int) -> List[Dict]:
+        """
+        Crea varios clientes ficticios con el endpoint de creación masiva.
+
+        Args:
+            num_clientes (int): Número de clientes a crear
+
+        Returns:
+            List[Dict]: Clientes creados
+        """
+        try:
+            clientes = await asyncio.to_thread(
+                self._generate_many, self._generate_cliente_data, num_clientes
+            )
+            clientes_creados = await self._post_bulk("/clientes/bulk/", clientes)
+            logger.info(f"Clientes creados: {len(clientes_creados)}")
+            return clientes_creados
+        except httpx.HTTPError as e:
+            logger.error(f"Error creando clientes: {str(e)}")
+            raise
+
     async def create_venta(self, cliente_id: int, productos: List[Dict]) -> Dict:
         """
         Crea una venta con sus detalles.
@@ -210,16 +356,15 @@ class DataSeeder:
             }
 
             # Realiza la petición POST al endpoint de ventas
-            response = await self.client.post(
-                f"{self.base_url}/ventas/",
-                json=venta_data
-            )
+            response = await self._post(f"{self.base_url}/ventas/", venta_data)
             # Verifica si hubo errores en la respuesta
             response.raise_for_status()
             # Convierte la respuesta a JSON
             venta_creada = response.json()
             # Registra la creación exitosa en el log
-            logger.info(f"Venta creada para cliente {cliente_id}: ${total:.2f}")
+            # Un registro por venta: en DEBUG y con argumentos diferidos, de modo que
+            # con el nivel INFO no se formatea ni se escribe nada por cada petición
+            logger.debug("Venta creada para cliente %s: $%.2f", cliente_id, total)
             # Retorna la venta creada
             return venta_creada
 
@@ -227,32 +372,48 @@ class DataSeeder:
             logger.error(f"Error HTTP creando venta: {str(e)}\nStatus: {e.response.status_code if hasattr(e, 'response') else 'No response'}\nDetalle: {e.response.text if hasattr(e, 'response') else 'No details'}")
             raise
 
-    async def create_historial_compras(self, cliente_id: int, productos: List[Dict], num_ventas: int = None) -> List[Dict]:
+    async def create_historiales_compras(self, clientes: List[Dict], productos: List[Dict]) -> int:
         """
-        Crea un historial de compras para un cliente.
+        Crea el historial de compras de varios clientes con un pool fijo de workers.
+
+        Un productor encola una venta por trabajo (entre 1 y 10 por cliente) en una
+        cola acotada y MAX_CONCURRENT_REQUESTS workers las envían. Así nunca existen
+        más corrutinas ni peticiones pendientes que las que admite la cola, sea
+        cual sea el número de clientes.
 
         Args:
-            cliente_id (int): ID del cliente
+            clientes (List[Dict]): Clientes creados
             productos (List[Dict]): Lista de productos disponibles
-            num_ventas (int, optional): Número de ventas a crear. Si es None, será aleatorio entre 1-10
 
         Returns:
-            List[Dict]: Lista de ventas creadas
+            int: Número de ventas creadas
         """
-        if num_ventas is None:
-            num_ventas = random.randint(1, 10)
-            
-        ventas = []
-        for _ in range(num_ventas):
-            try:
-                venta = await self.create_venta(cliente_id, productos)
-                ventas.append(venta)
-                # Pequeña pausa para no sobrecargar la API
-                await asyncio.sleep(0.1)
-            except Exception as e:
-                logger.error(f"Error creando historial de compras: {str(e)}")
-                continue
-        return ventas
+        cola: asyncio.Queue = asyncio.Queue(maxsize=self.VENTAS_QUEUE_SIZE)
+        ventas_creadas = 0
+
+        async def worker():
+            nonlocal ventas_creadas
+            while True:
+                cliente_id = await cola.get()
+                try:
+                    await self.create_venta(cliente_id, productos)
+                    ventas_creadas += 1
+                except Exception as e:
+                    logger.error(f"Error creando historial de compras: {str(e)}")
+                finally:
+                    cola.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.MAX_CONCURRENT_REQUESTS)]
+        try:
+            for cliente in clientes:
+                for _ in range(random.randint(1, 10)):
+                    await cola.put(cliente['id'])
+            await cola.join()
+        finally:
+            for tarea in workers:
+                tarea.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return ventas_creadas
 
     async def seed_data(self, num_usuarios: int = 10, num_productos: int = 30, num_clientes: int = 20):
         """
@@ -269,52 +430,66 @@ class DataSeeder:
             # Obtener productos existentes o crear nuevos
             productos_existentes = await self.get_existing_productos()
             if not productos_existentes:
-                # Crear productos solo si no existen
-                productos_tasks = [self.create_producto() for _ in range(num_productos)]
-                productos_creados = await asyncio.gather(*productos_tasks, return_exceptions=True)
-                productos_existentes = [p for p in productos_creados if not isinstance(p, Exception)]
+                # Crear productos solo si no existen, en lotes con un solo INSERT cada uno
+                productos_existentes = await self.create_productos_bulk(num_productos)
 
             # Crear clientes y su historial de compras
-            clientes_tasks = [self.create_cliente() for _ in range(num_clientes)]
-            clientes_creados = await asyncio.gather(*clientes_tasks, return_exceptions=True)
-            clientes_exitosos = [c for c in clientes_creados if not isinstance(c, Exception)]
+            clientes_exitosos = await self.create_clientes_bulk(num_clientes)
 
             # Crear historial de compras para cada cliente
-            for cliente in clientes_exitosos:
-                await self.create_historial_compras(cliente['id'], productos_existentes)
+            ventas_creadas = await self.create_historiales_compras(clientes_exitosos, productos_existentes)
 
             logger.info(f"""
                 Proceso completado:
                 - Productos disponibles: {len(productos_existentes)}
                 - Clientes creados: {len(clientes_exitosos)}
+                - Ventas creadas: {ventas_creadas}
             """)
 
         except Exception as e:
             logger.error(f"Error general en seed_data: {str(e)}")
             raise
-        finally:
-            await self.close()
 
 async def main():
     """Función principal para ejecutar el seeder."""
     try:
-        seeder = DataSeeder()
-        await seeder.seed_data(num_usuarios=10, num_productos=30, num_clientes=20)
+        async with DataSeeder() as seeder:
+            await seeder.seed_data(num_usuarios=10, num_productos=30, num_clientes=20)
         
     except Exception as e:
         logger.error(f"Error en la ejecución principal: {str(e)}")
         raise
 
 if __name__ == "__main__":
+    # Configuración de logging solo al ejecutar el script; importado desde la API
+    # (endpoint /seed) se usa la configuración de la aplicación. Como en la API,
+    # los manejadores corren en el hilo del QueueListener y el event loop solo
+    # encola los registros, sin esperar la escritura a disco
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler('seeder.log'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue: queue.Queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, *handlers)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
+    # httpx registra cada petición en INFO; el seeder ya resume los totales
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    log_listener.start()
+
     # Crear directorio de logs si no existe
     Path("logs").mkdir(exist_ok=True)
     
-    # Ejecutar el seeder
-    start_time = datetime.now()
-    logger.info("Iniciando proceso de seeding...")
-    
-    asyncio.run(main())
-    
-    end_time = datetime.now()
-    duration = end_time - start_time
-    logger.info(f"Proceso completado en {duration.total_seconds():.2f} segundos")
\ No newline at end of file
+    # Ejecutar el seeder; detener el listener vacía la cola aunque haya errores
+    try:
+        start_time = datetime.now()
+        logger.info("Iniciando proceso de seeding...")
+        
+        asyncio.run(main())
+        
+        end_time = datetime.now()
+        duration = end_time - start_time
+        logger.info(f"Proceso completado en {duration.total_seconds():.2f} segundos")
+    finally:
+        log_listener.stop()
\ No newline at end of file
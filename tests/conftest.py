@@ -1,12 +1,16 @@
 import os
 import pytest
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Callable, Generator
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, event
+from sqlalchemy import Connection, create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+import pytest_asyncio
 from dotenv import load_dotenv
+from argon2 import PasswordHasher, Type
 
 # Configuración específica de logging para tests
 logging.basicConfig(
@@ -21,17 +25,37 @@ logging.basicConfig(
 load_dotenv(".env.test")
 
 # Importar después de cargar variables de entorno
-from app.db.base import Base
+from app.db.base import Base, SessionLocal, engine
 from app.main import app, get_db
+from app.core.config import settings
+from app.core import auth as core_auth
+from app.core import security
+from app.core.security import get_password_hash
+from app.services.recomendacion import sistema_recomendaciones
 
-# Crear engine de prueba
-SQLALCHEMY_DATABASE_URL = (
+# Crear engine de prueba. TEST_DATABASE_URL=sqlite:// permite correr la suite
+# sobre SQLite en memoria; por defecto se usa PostgreSQL, el motor de producción
+SQLALCHEMY_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or (
     f"postgresql://{os.getenv('DATABASE_USER')}:{os.getenv('DATABASE_PASSWORD')}"
     f"@{os.getenv('DATABASE_HOST')}:{os.getenv('DATABASE_PORT')}/{os.getenv('DATABASE_NAME')}"
 )
 
-engine_test = create_engine(SQLALCHEMY_DATABASE_URL)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_test)
+# Los tests corren en serie: StaticPool reutiliza una única conexión sin la
+# contabilidad de checkout de QueuePool. En SQLite es además lo que mantiene viva
+# la base en memoria. synchronous_commit=off evita esperar el fsync del WAL en
+# cada COMMIT; es seguro porque los datos de prueba se descartan
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    _test_connect_args = {"check_same_thread": False}
+else:
+    _test_connect_args = {"options": "-c synchronous_commit=off"}
+engine_test = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=StaticPool,
+    connect_args=_test_connect_args
+)
+# Mismas opciones que SessionLocal de producción: sin expirar los objetos en el
+# commit, de modo que los tests cubren los endpoints que ya no hacen refresh()
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine_test)
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_database():
@@ -43,6 +67,36 @@ def setup_test_database():
     yield
     Base.metadata.drop_all(bind=engine_test)
 
+@pytest.fixture(autouse=True)
+def debug_mode(monkeypatch):
+    """
+    Fixture que activa el modo DEBUG en todas las pruebas.
+    Con raiseload, cualquier carga perezosa no prevista falla el test.
+    """
+    monkeypatch.setattr(settings, "DEBUG", True)
+
+# Cachés en proceso de la aplicación. Sus claves (usernames, IDs) se repiten
+# entre tests porque los datos se revierten; en SQLite incluso los IDs se reutilizan
+_APP_CACHES = (
+    core_auth._user_cache,
+    security._verify_cache,
+    security._token_cache,
+    sistema_recomendaciones._preferences_cache,
+    sistema_recomendaciones._bought_together_cache,
+)
+
+@pytest.fixture(autouse=True)
+def clear_app_caches() -> Generator[None, None, None]:
+    """
+    Fixture que vacía las cachés en proceso antes y después de cada test,
+    para que ningún test reciba resultados calculados con datos de otro.
+    """
+    for cache in _APP_CACHES:
+        cache.clear()
+    yield
+    for cache in _APP_CACHES:
+        cache.clear()
+
 @pytest.fixture(scope="function")
 def db_session() -> Generator[Session, None, None]:
     """
@@ -65,33 +119,163 @@ def db_session() -> Generator[Session, None, None]:
 
     yield session
 
+    # Quitar el listener antes de cerrar: evita abrir un savepoint que nadie usará
+    # y que el registro de eventos conserve referencias a la sesión de cada test
+    event.remove(session, "after_transaction_end", end_savepoint)
+
     # Rollback y cierre
     session.close()
     transaction.rollback()
     connection.close()
 
+@pytest.fixture(scope="module")
+def db_connection_module() -> Generator[Connection, None, None]:
+    """
+    Fixture que proporciona una conexión con una transacción abierta durante
+    todo un módulo de pruebas. Los datos compartidos por el módulo se crean
+    dentro de ella y se descartan con un rollback al terminar.
+    """
+    connection = engine_test.connect()
+    transaction = connection.begin()
+    yield connection
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="module")
+def db_session_module(db_connection_module: Connection) -> Generator[Session, None, None]:
+    """
+    Fixture que proporciona una sesión de alcance de módulo para crear datos compartidos.
+    Con create_savepoint, sus commit solo liberan un savepoint: nada sale de la
+    transacción del módulo.
+    """
+    session = TestingSessionLocal(bind=db_connection_module, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+
 @pytest.fixture(scope="function")
-def client(db_session: Session) -> Generator[TestClient, None, None]:
+def db_session_in_module(db_connection_module: Connection) -> Generator[Session, None, None]:
     """
-    Fixture que proporciona un cliente de prueba de FastAPI.
+    Fixture que proporciona una sesión por test sobre la transacción del módulo.
+    Ve los datos de db_session_module y revierte sus propios cambios al terminar.
+    """
+    savepoint = db_connection_module.begin_nested()
+    session = TestingSessionLocal(bind=db_connection_module, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    if savepoint.is_active:
+        savepoint.rollback()
+
+# Hasher con los parámetros mínimos de Argon2id: los hashes siguen siendo válidos
+# y verificables, pero cuestan microsegundos en lugar de cientos de milisegundos
+FAST_PASSWORD_HASHER = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1, type=Type.ID)
+_PRODUCTION_PASSWORD_HASHER = security._password_hasher
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hasher() -> Generator[None, None, None]:
+    """
+    Fixture que sustituye el hasher de contraseñas durante toda la sesión de pruebas.
+    Registro, login y fixtures dejan de pagar el costo de Argon2 de producción.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(security, "_password_hasher", FAST_PASSWORD_HASHER)
+        security.get_dummy_password_hash.cache_clear()
+        yield
+    security.get_dummy_password_hash.cache_clear()
+
+@pytest.fixture(scope="function")
+def real_password_hasher(monkeypatch) -> None:
+    """
+    Fixture que restaura el hasher de producción para un test concreto,
+    para validar el hashing con los parámetros reales.
+    """
+    monkeypatch.setattr(security, "_password_hasher", _PRODUCTION_PASSWORD_HASHER)
+
+@pytest.fixture(scope="session")
+def hashed_test_password(fast_password_hasher) -> str:
+    """
+    Fixture que calcula una sola vez el hash de "testpassword123".
+    Argon2 es costoso a propósito; los tests que solo necesitan un usuario
+    con contraseña conocida reutilizan este hash.
     
-    Args:
-        db_session (Session): Sesión de base de datos proporcionada por el fixture db_session
-        
-    Yields:
-        TestClient: Cliente de prueba de FastAPI
+    Returns:
+        str: Hash de la contraseña de prueba
+    """
+    return get_password_hash("testpassword123")
+
+def _override_get_db(db_session: Session) -> Callable[[], Generator[Session, None, None]]:
+    """
+    Construye el reemplazo de get_db que entrega la sesión del test.
+
+    Como get_db, revierte la transacción si el endpoint lanza una excepción,
+    de modo que los tests ven el mismo estado que vería la siguiente petición.
     """
     def override_get_db():
         try:
             yield db_session
-        finally:
-            pass
+        except Exception:
+            db_session.rollback()
+            raise
+    return override_get_db
 
-    app.dependency_overrides[get_db] = override_get_db
+@pytest.fixture(scope="session")
+def app_client() -> Generator[TestClient, None, None]:
+    """
+    Fixture que proporciona un cliente de FastAPI compartido por toda la sesión.
+    El arranque y el cierre de la aplicación se ejecutan una sola vez.
+
+    Sobre SQLite no se entra en el ciclo de vida de la aplicación: el arranque
+    crea las tablas y verifica el esquema con el motor de producción (PostgreSQL),
+    y las tablas de prueba ya las crea setup_test_database. Las sesiones de la
+    aplicación se enlazan al motor de prueba para las peticiones sin override de get_db.
     
+    Yields:
+        TestClient: Cliente de prueba de FastAPI
+    """
+    if engine_test.dialect.name == "sqlite":
+        SessionLocal.configure(bind=engine_test)
+        try:
+            yield TestClient(app)
+        finally:
+            SessionLocal.configure(bind=engine)
+        return
     with TestClient(app) as test_client:
         yield test_client
 
+@pytest.fixture(scope="function")
+def client(db_session: Session, app_client: TestClient) -> Generator[TestClient, None, None]:
+    """
+    Fixture que proporciona un cliente de prueba de FastAPI.
+    
+    Args:
+        db_session (Session): Sesión de base de datos proporcionada por el fixture db_session
+        app_client (TestClient): Cliente compartido de la sesión de pruebas
+        
+    Yields:
+        TestClient: Cliente de prueba de FastAPI
+    """
+    app.dependency_overrides[get_db] = _override_get_db(db_session)
+    
+    yield app_client
+
+    app.dependency_overrides.clear()
+    app_client.cookies.clear()
+
+@pytest_asyncio.fixture
+async def async_client(db_session: Session) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Fixture que proporciona un cliente asíncrono de httpx sobre la aplicación.
+    Las peticiones se sirven en el mismo event loop del test, sin el hilo que
+    TestClient usa como puente; no ejecuta los eventos de arranque.
+
+    Args:
+        db_session (Session): Sesión de base de datos proporcionada por el fixture db_session
+
+    Yields:
+        AsyncClient: Cliente asíncrono de prueba
+    """
+    app.dependency_overrides[get_db] = _override_get_db(db_session)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as test_client:
+        yield test_client
     app.dependency_overrides.clear()
 
 #hola
\ No newline at end of file
@@ -1,121 +1,99 @@
 import pytest
-from fastapi.testclient import TestClient
+from httpx import AsyncClient
 from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
+import threading
 
-from app.core.security import get_password_hash, verificar_password
+from app.core import auth as core_auth
+from app.core.security import crear_token_acceso, verificar_password
 from app.models.usuario import Usuario
 from app.main import app
 
-# Configurar logging para los tests
+# El nivel y los handlers los configura pytest (--log-level), no el módulo
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+def _register_payload(email: str, username: str, password: str = "Test123!@#") -> dict:
+    """Construye el cuerpo de /auth/register con la contraseña confirmada."""
+    return {
+        "email": email,
+        "username": username,
+        "password": password,
+        "password_confirm": password,
+        "rol": "usuario"
+    }
+
+# (email, username, password, código esperado)
+REGISTER_CASES = [
+    pytest.param("test.new@example.com", "testnewuser", "Test123!@#", 201, id="success"),
+    pytest.param("test.invalid@example.com", "testinvalid", "weak", 422, id="invalid_data"),
+]
+
+# Contraseña en texto plano de hashed_test_password
+LOGIN_USER_PASSWORD = "testpassword123"
+
+@pytest.fixture
+def registered_login_user(db_session: Session, hashed_test_password: str) -> Usuario:
+    """
+    Fixture que inserta directamente un usuario para las pruebas de login.
+    Evita pasar por /auth/register y reutiliza el hash precalculado de la sesión.
+    """
+    user = Usuario(
+        email="test.login@example.com",
+        username="testlogin",
+        password=hashed_test_password,
+        rol="usuario"
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+class _RedisEnHilos:
+    """Redis falso que registra el hilo desde el que se le consulta."""
+
+    def __init__(self):
+        self.hilos = []
+
+    def get(self, key):
+        self.hilos.append(threading.get_ident())
+        return None
+
+    def setex(self, key, ttl, value):
+        self.hilos.append(threading.get_ident())
 
 @pytest.mark.auth
+@pytest.mark.asyncio
 class TestAuth:
     """Suite de pruebas para el sistema de autenticación."""
 
-    def cleanup_test_users(self, db_session: Session):
-        """
-        Limpia solo los usuarios creados durante las pruebas.
-        """
-        test_emails = [
-            "test.new@example.com",     # Para test_register_success
-            "test.invalid@example.com",  # Para test_register_invalid_data
-            "test.dup@example.com",      # Para test_register_duplicate_email
-            "test.hash@example.com",     # Para test_password_is_hashed
-            "test.login@example.com",    # Para tests de login
-            "test.inactive@example.com", # Para test de usuario inactivo
-        ]
-        for email in test_emails:
-            db_session.query(Usuario).filter(Usuario.email == email).delete()
-        db_session.commit()
-
-    @pytest.fixture(autouse=True)
-    def setup_method(self, db_session: Session):
-        """Limpia solo los usuarios de prueba antes y después de cada test."""
-        self.cleanup_test_users(db_session)
-        yield
-        self.cleanup_test_users(db_session)
-
-    def test_register_success(self, client: TestClient, db_session: Session):
-        """Prueba el registro exitoso de un nuevo usuario."""
-        response = client.post(
-            "/auth/register",
-            json={
-                "email": "test.new@example.com",
-                "username": "testnewuser",
-                "password": "Test123!@#",
-                "password_confirm": "Test123!@#",
-                "rol": "usuario"
-            }
-        )
-        assert response.status_code == 201
-        data = response.json()
-        assert data["email"] == "test.new@example.com"
-        assert data["username"] == "testnewuser"
-        assert data["rol"] == "usuario"
-
-    def test_register_invalid_data(self, client: TestClient):
-        """Prueba el registro con datos inválidos."""
-        response = client.post(
-            "/auth/register",
-            json={
-                "email": "test.invalid@example.com",
-                "username": "testinvalid",
-                "password": "weak",
-                "password_confirm": "weak",
-                "rol": "usuario"
-            }
-        )
-        assert response.status_code == 422
-
-    def test_register_duplicate_email(self, client: TestClient, db_session: Session):
+    @pytest.mark.parametrize("email,username,password,expected", REGISTER_CASES)
+    async def test_register(self, async_client: AsyncClient, email: str, username: str, password: str, expected: int):
+        """Prueba el registro de un nuevo usuario con datos válidos e inválidos."""
+        response = await async_client.post("/auth/register", json=_register_payload(email, username, password))
+        assert response.status_code == expected, response.text
+        if expected == 201:
+            data = response.json()
+            assert data["email"] == email
+            assert data["username"] == username
+            assert data["rol"] == "usuario"
+
+    async def test_register_duplicate_email(self, async_client: AsyncClient, db_session: Session):
         """Prueba el registro con un email ya existente."""
         # Crear primer usuario
-        response = client.post(
-            "/auth/register",
-            json={
-                "email": "test.dup@example.com",
-                "username": "testdup1",
-                "password": "Test123!@#",
-                "password_confirm": "Test123!@#",
-                "rol": "usuario"
-            }
-        )
+        response = await async_client.post("/auth/register", json=_register_payload("test.dup@example.com", "testdup1"))
         assert response.status_code == 201
 
         # Intentar crear segundo usuario con el mismo email
-        response = client.post(
-            "/auth/register",
-            json={
-                "email": "test.dup@example.com",
-                "username": "testdup2",
-                "password": "Test123!@#",
-                "password_confirm": "Test123!@#",
-                "rol": "usuario"
-            }
-        )
+        response = await async_client.post("/auth/register", json=_register_payload("test.dup@example.com", "testdup2"))
         assert response.status_code == 400
         assert "email ya está registrado" in response.json()["detail"].lower()
 
-    def test_password_is_hashed(self, client: TestClient, db_session: Session):
-        """Verifica que las contraseñas se almacenen hasheadas."""
+    async def test_password_is_hashed(self, async_client: AsyncClient, db_session: Session, real_password_hasher):
+        """Verifica que las contraseñas se almacenen hasheadas con el hasher de producción."""
         # Registrar un nuevo usuario
-        response = client.post(
-            "/auth/register",
-            json={
-                "email": "test.hash@example.com",
-                "username": "testhash",
-                "password": "Test123!@#",
-                "password_confirm": "Test123!@#",
-                "rol": "usuario"
-            }
-        )
-        logger.info(f"Register response status: {response.status_code}")
-        if response.status_code != 201:
-            logger.error(f"Register response body: {response.json()}")
+        response = await async_client.post("/auth/register", json=_register_payload("test.hash@example.com", "testhash"))
+        if response.status_code >= 400:
+            logger.error(f"Register response body: {response.text}")
         assert response.status_code == 201
         
         # Obtener el usuario de la base de datos
@@ -131,39 +109,20 @@ class TestAuth:
         # Verificar que una contraseña incorrecta no valide
         assert not verificar_password("WrongPassword123!", user.password), "La validación acepta contraseñas incorrectas"
 
-    def test_login_success_with_username(self, client: TestClient, db_session: Session):
+    async def test_login_success_with_username(self, async_client: AsyncClient, registered_login_user: Usuario):
         """Prueba login exitoso usando nombre de usuario."""
-        # Limpiar datos previos
-        db_session.query(Usuario).filter(Usuario.email == "test.login@example.com").delete()
-        db_session.commit()
-
-        # Crear usuario de prueba
-        user_data = {
-            "email": "test.login@example.com",
-            "username": "testlogin",
-            "password": "Test123!@#",
-            "password_confirm": "Test123!@#",
-            "rol": "usuario"
-        }
-        
-        # Registrar usuario
-        response = client.post("/auth/register", json=user_data)
-        logger.info(f"Register response status: {response.status_code}")
-        logger.info(f"Register response body: {response.json()}")
-        assert response.status_code == 201, f"Error en registro: {response.json()}"
-
         # Intentar login con username
-        login_response = client.post(
+        login_response = await async_client.post(
             "/auth/login",
             data={
-                "username": "testlogin",
-                "password": "Test123!@#"
+                "username": registered_login_user.username,
+                "password": LOGIN_USER_PASSWORD
             }
         )
         
-        logger.info(f"Login response status: {login_response.status_code}")
-        logger.info(f"Login response body: {login_response.json()}")
-        assert login_response.status_code == 200, f"Error en login: {login_response.json()}"
+        if login_response.status_code >= 400:
+            logger.error(f"Login response body: {login_response.text}")
+        assert login_response.status_code == 200, f"Error en login: {login_response.text}"
         data = login_response.json()
         assert "access_token" in data
         assert data["token_type"] == "bearer"
@@ -234,9 +193,9 @@ class TestAuth:
     #     assert login_response.status_code == 403, f"Expected 403 but got {login_response.status_code}"
     #     assert "Usuario inactivo" in login_response.json()["detail"] """
 
-    def test_login_nonexistent_user(self, client: TestClient):
+    async def test_login_nonexistent_user(self, async_client: AsyncClient):
         """Prueba login con usuario que no existe."""
-        login_response = client.post(
+        login_response = await async_client.post(
             "/auth/login",
             data={
                 "username": "nonexistent@example.com",
@@ -244,7 +203,19 @@ class TestAuth:
             }
         )
         
-        logger.info(f"Nonexistent user login response status: {login_response.status_code}")
-        logger.info(f"Nonexistent user login response body: {login_response.json()}")
-        assert login_response.status_code == 401
-        assert "Credenciales incorrectas" in login_response.json()["detail"]
\ No newline at end of file
+        assert login_response.status_code == 401, login_response.text
+        assert "Credenciales incorrectas" in login_response.json()["detail"]
+
+    async def test_me_consulta_redis_fuera_del_event_loop(
+        self, async_client: AsyncClient, registered_login_user: Usuario, monkeypatch
+    ):
+        """Verifica que la caché Redis de usuarios se consulta en el threadpool y no bloquea el event loop."""
+        redis_falso = _RedisEnHilos()
+        monkeypatch.setattr(core_auth, "get_redis", lambda: redis_falso)
+        token = crear_token_acceso(data={"sub": registered_login_user.username, "rol": "usuario"})
+
+        response = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200, response.text
+        assert redis_falso.hilos
+        assert threading.get_ident() not in redis_falso.hilos
@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.cliente import Cliente as ClienteModel
+
+def _clientes_payload(*emails: str) -> list:
+    """Construye el cuerpo de POST /clientes/bulk/ con un cliente por email."""
+    return [
+        {"nombre": f"Cliente {i}", "email": email, "telefono": f"555000{i}"}
+        for i, email in enumerate(emails)
+    ]
+
+def test_create_clientes_bulk(client: TestClient, db_session: Session):
+    """
+    Verifica la creación masiva y que las filas se devuelven en el orden recibido.
+    """
+    emails = ["bulk.c@example.com", "Bulk.A@example.com", "bulk.b@example.com"]
+
+    response = client.post("/clientes/bulk/", json=_clientes_payload(*emails))
+
+    assert response.status_code == 200, response.text
+    creados = response.json()
+    assert [c["email"] for c in creados] == [email.lower() for email in emails]
+    assert [c["nombre"] for c in creados] == ["Cliente 0", "Cliente 1", "Cliente 2"]
+    ids = [c["id"] for c in creados]
+    assert ids == sorted(ids)
+    guardados = db_session.execute(
+        select(ClienteModel.id, ClienteModel.email).where(ClienteModel.id.in_(ids))
+    ).all()
+    assert {(row.id, row.email) for row in guardados} == {(c["id"], c["email"]) for c in creados}
+
+def test_create_clientes_bulk_email_repetido(client: TestClient, db_session: Session):
+    """
+    Verifica que un email repetido dentro del lote (sin distinguir mayúsculas)
+    devuelve 400 y no inserta ningún cliente del lote.
+    """
+    response = client.post("/clientes/bulk/", json=_clientes_payload(
+        "bulk.dup@example.com", "bulk.otro@example.com", "BULK.DUP@example.com"
+    ))
+
+    assert response.status_code == 400
+    assert "emails ya están registrados" in response.json()["detail"]
+    insertados = db_session.execute(
+        select(func.count()).select_from(ClienteModel)
+        .where(ClienteModel.email.in_(["bulk.dup@example.com", "bulk.otro@example.com"]))
+    ).scalar()
+    assert insertados == 0
+
+def test_create_clientes_bulk_vacio(client: TestClient):
+    """
+    Verifica que un lote vacío no ejecuta ningún INSERT y devuelve una lista vacía.
+    """
+    response = client.post("/clientes/bulk/", json=[])
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_update_cliente_email_solo_mayusculas(client: TestClient, db_session: Session):
+    """
+    Verifica que cambiar solo las mayúsculas del propio email no es un conflicto
+    y que el email se guarda normalizado.
+    """
+    cliente = ClienteModel(nombre="Cliente Propio", email="propio@example.com")
+    db_session.add(cliente)
+    db_session.commit()
+
+    response = client.put(f"/clientes/{cliente.id}", json={"email": "Propio@Example.com"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == "propio@example.com"
+
+def test_update_cliente_email_de_otro(client: TestClient, db_session: Session):
+    """
+    Verifica que no se puede tomar el email de otro cliente aunque cambien las mayúsculas.
+    """
+    otro = ClienteModel(nombre="Cliente Otro", email="otro@example.com")
+    cliente = ClienteModel(nombre="Cliente Nuevo", email="nuevo@example.com")
+    db_session.add_all([otro, cliente])
+    db_session.commit()
+
+    response = client.put(f"/clientes/{cliente.id}", json={"email": "OTRO@example.com"})
+
+    assert response.status_code == 400
+    assert "email ya está registrado" in response.json()["detail"]
@@ -1,45 +1,63 @@
-import pytest
-from fastapi.testclient import TestClient
-from app.main import app  # Asegúrar de importar tu aplicación FastAPI
-from app.db.session import get_db
-from app.models.producto import Producto as ProductoModel
-from app.schemas.producto import ProductoCreate, ProductoUpdate
-
-client = TestClient(app)
-
-@pytest.fixture(scope="module")
-def test_db():
-    # Aquí se debe crear una base de datos de prueba y configurarla
-    yield  # Esto ejecuta las pruebas
-    # Aquí se debe limpiar la base de datos de prueba
-
-def test_create_producto(test_db):
-    response = client.post("/productos/", json={
-        "nombre": "testproduct",
-        "descripcion": "A product for testing",
-        "precio": 10.0,
-        "stock": 100,
-        "categoria": "test"
-    })
-    assert response.status_code == 200
-    assert response.json()["nombre"] == "testproduct"
-
-def test_read_productos(test_db):
-    response = client.get("/productos/")
-    assert response.status_code == 200
-    assert isinstance(response.json(), list)
-
-def test_read_producto(test_db):
-    response = client.get("/productos/1")  # Asegúrar de que el ID 1 exista
-    assert response.status_code == 200
-    assert response.json()["nombre"] == "testproduct"
-
-def test_update_producto(test_db):
-    response = client.put("/productos/1", json={"nombre": "updatedproduct"})
-    assert response.status_code == 200
-    assert response.json()["nombre"] == "updatedproduct"
-
-def test_delete_producto(test_db):
-    response = client.delete("/productos/1")  # Asegúrar de que el ID 1 exista
-    assert response.status_code == 200
-    assert response.json()["nombre"] == "updatedproduct"  # Compruebar el producto eliminado
+import pytest
+from app.main import app  # Asegúrar de importar tu aplicación FastAPI
+from app.db.session import get_db
+from app.models.producto import Producto as ProductoModel
+from app.schemas.producto import ProductoCreate, ProductoUpdate
+
+@pytest.fixture(scope="module")
+def test_db():
+    # Aquí se debe crear una base de datos de prueba y configurarla
+    yield  # Esto ejecuta las pruebas
+    # Aquí se debe limpiar la base de datos de prueba
+
+def test_create_producto(test_db, app_client):
+    response = app_client.post("/productos/", json={
+        "nombre": "testproduct",
+        "descripcion": "A product for testing",
+        "precio": 10.0,
+        "stock": 100,
+        "categoria": "test"
+    })
+    assert response.status_code == 200
+    assert response.json()["nombre"] == "testproduct"
+
+def test_read_productos(test_db, app_client):
+    response = app_client.get("/productos/")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+def test_read_productos_keyset(test_db, app_client):
+    response = app_client.get("/productos/", params={"after_id": 0, "limit": 1})
+    assert response.status_code == 200
+    productos = response.json()
+    assert len(productos) == 1
+    assert response.headers["X-Next-Cursor"] == str(productos[0]["id"])
+
+def test_read_producto(test_db, app_client):
+    response = app_client.get("/productos/1")  # Asegúrar de que el ID 1 exista
+    assert response.status_code == 200
+    assert response.json()["nombre"] == "testproduct"
+
+def test_update_producto(test_db, app_client):
+    response = app_client.put("/productos/1", json={"nombre": "updatedproduct"})
+    assert response.status_code == 200
+    assert response.json()["nombre"] == "updatedproduct"
+
+def test_delete_producto(test_db, app_client):
+    response = app_client.delete("/productos/1")  # Asegúrar de que el ID 1 exista
+    assert response.status_code == 200
+    assert response.json()["nombre"] == "updatedproduct"  # Compruebar el producto eliminado
+
+def test_create_productos_bulk(client):
+    nombres = ["bulk producto c", "bulk producto a", "bulk producto b"]
+    response = client.post("/productos/bulk/", json=[
+        {"nombre": nombre, "descripcion": "Producto masivo", "precio": 10.0 * (i + 1), "stock": i, "categoria": "bulk"}
+        for i, nombre in enumerate(nombres)
+    ])
+    assert response.status_code == 200
+    creados = response.json()
+    # Mismo orden que el lote recibido
+    assert [p["nombre"] for p in creados] == nombres
+    assert [p["stock"] for p in creados] == [0, 1, 2]
+    ids = [p["id"] for p in creados]
+    assert ids == sorted(ids)
@@ -1,4 +1,5 @@
 import pytest
+from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
@@ -9,11 +10,26 @@ from app.models.detalle_venta import DetalleVenta
 from app.services.recomendacion.sistema_recomendaciones import RecomendacionService
 
 @pytest.fixture
-def setup_test_data(db_session: Session):
+def db_session(db_session_in_module: Session) -> Session:
+    """
+    Sesión de cada test sobre la transacción del módulo, para que vea los datos
+    de setup_test_data; sus cambios se revierten al terminar el test.
+    """
+    return db_session_in_module
+
+@pytest.fixture
+def servicio(db_session: Session) -> RecomendacionService:
+    """Servicio de recomendaciones sobre la sesión del test."""
+    return RecomendacionService(db_session)
+
+@pytest.fixture(scope="module")
+def setup_test_data(db_session_module: Session):
     """
     Fixture que crea datos de prueba necesarios para los tests.
-    Incluye productos, clientes y algunas ventas.
+    Incluye productos, clientes y algunas ventas. Se crea una vez por módulo
+    y se descarta con el rollback de la transacción del módulo.
     """
+    db_session = db_session_module
     # Crear productos de prueba
     productos = [
         Producto(
@@ -24,17 +40,17 @@ def setup_test_data(db_session: Session):
             ventas_ultimo_mes=10 if i < 2 else 5
         ) for i in range(1, 5)
     ]
-    for p in productos:
-        db_session.add(p)
-    
+
     # Crear cliente de prueba
     cliente = Cliente(
         nombre="Cliente Test",
         email="test@example.com",
         telefono="1234567890"
     )
-    db_session.add(cliente)
-    db_session.commit()
+    # flush en lugar de commit: basta para obtener los IDs, y los productos se
+    # insertan en un solo INSERT por lotes
+    db_session.add_all([*productos, cliente])
+    db_session.flush()
 
     # Crear algunas ventas para el historial
     venta = Venta(
@@ -44,7 +60,7 @@ def setup_test_data(db_session: Session):
         fecha_venta=datetime.utcnow() - timedelta(days=5)
     )
     db_session.add(venta)
-    db_session.commit()
+    db_session.flush()
 
     # Agregar detalles de venta
     detalles = [
@@ -61,9 +77,10 @@ def setup_test_data(db_session: Session):
             precio_unitario=200.0
         )
     ]
-    for d in detalles:
-        db_session.add(d)
-    db_session.commit()
+    db_session.add_all(detalles)
+    # Sin commit: los datos solo viven en la transacción del módulo, y los
+    # objetos no se expiran, por lo que los tests leen sus atributos sin consultas
+    db_session.flush()
 
     return {
         'cliente': cliente,
@@ -71,22 +88,20 @@ def setup_test_data(db_session: Session):
         'venta': venta
     }
 
-def test_get_client_purchase_history(db_session: Session, setup_test_data):
+def test_get_client_purchase_history(servicio: RecomendacionService, setup_test_data):
     """
     Test unitario que verifica la obtención correcta del historial de compras de un cliente.
     """
-    servicio = RecomendacionService(db_session)
     cliente = setup_test_data['cliente']
     
     historial = servicio._get_client_purchase_history(cliente.id)
     assert len(historial) == 2  # Debe haber dos productos en el historial
     assert all(isinstance(item[0], int) and isinstance(item[1], str) for item in historial)
 
-def test_calculate_recommendation_score(db_session: Session, setup_test_data):
+def test_calculate_recommendation_score(servicio: RecomendacionService, setup_test_data):
     """
     Test unitario que verifica el cálculo correcto del score de recomendación.
     """
-    servicio = RecomendacionService(db_session)
     producto = setup_test_data['productos'][0]
     
     # Probar con diferentes combinaciones de parámetros
@@ -106,11 +121,10 @@ def test_calculate_recommendation_score(db_session: Session, setup_test_data):
     assert 0 <= score2 <= 1
     assert score2 < score1  # Debería ser menor sin la coincidencia de categoría actual
 
-def test_generar_recomendaciones_integration(db_session: Session, setup_test_data):
+def test_generar_recomendaciones_integration(servicio: RecomendacionService, setup_test_data):
     """
     Test de integración que verifica el flujo completo de generación de recomendaciones.
     """
-    servicio = RecomendacionService(db_session)
     cliente = setup_test_data['cliente']
     
     # Probar generación de recomendaciones sin producto semilla
@@ -125,13 +139,62 @@ def test_generar_recomendaciones_integration(db_session: Session, setup_test_dat
         assert all(key in rec for key in ['producto_id', 'nombre', 'score', 'baja_rotacion'])
         assert 0 <= rec['score'] <= 1
 
-def test_generar_recomendaciones_cliente_inexistente(db_session: Session):
+def test_generar_recomendaciones_cliente_inexistente(servicio: RecomendacionService):
     """
     Test unitario que verifica el manejo correcto de errores cuando se intenta generar
     recomendaciones para un cliente que no existe.
     """
-    servicio = RecomendacionService(db_session)
     
     with pytest.raises(ValueError) as excinfo:
         servicio.generar_recomendaciones(cliente_id=99999)
-    assert "Cliente 99999 no encontrado" in str(excinfo.value)
\ No newline at end of file
+    assert "Cliente 99999 no encontrado" in str(excinfo.value)
+def test_generar_recomendaciones_scores_igual_al_calculo_escalar(servicio: RecomendacionService, setup_test_data):
+    """
+    Test unitario que verifica que los scores devueltos (y guardados) coinciden
+    exactamente con _calculate_recommendation_score, sin pérdida de precisión.
+    """
+    cliente = setup_test_data['cliente']
+    productos = {producto.id: producto for producto in setup_test_data['productos']}
+    preferencias = servicio._get_category_preferences(cliente.id)
+
+    recomendaciones = servicio.generar_recomendaciones(cliente_id=cliente.id, limit=3)
+
+    propias = [rec for rec in recomendaciones if rec['producto_id'] in productos]
+    assert propias
+    for rec in propias:
+        esperado = servicio._calculate_recommendation_score(
+            productos[rec['producto_id']],
+            categoria_preferences=preferencias
+        )
+        assert rec['score'] == esperado
+
+def test_venta_invalida_recomendaciones_cacheadas(client: TestClient, servicio: RecomendacionService, setup_test_data):
+    """
+    Test de integración que verifica que registrar una venta invalida las
+    preferencias cacheadas del cliente y cambia sus recomendaciones.
+    """
+    cliente = setup_test_data['cliente']
+    producto_categoria2 = setup_test_data['productos'][3]
+
+    # Sin compras en categoria2, el producto solo alcanza el score mínimo
+    antes = {
+        rec['producto_id']: rec['score']
+        for rec in servicio.generar_recomendaciones(cliente_id=cliente.id, limit=4)
+    }
+    assert antes.get(producto_categoria2.id, servicio.MIN_SCORE) == servicio.MIN_SCORE
+
+    response = client.post("/ventas/", json={
+        "cliente_id": cliente.id,
+        "total": 400.0,
+        "estado": "completada",
+        "detalles_venta": [
+            {"producto_id": producto_categoria2.id, "cantidad": 1, "precio_unitario": 400.0}
+        ]
+    })
+    assert response.status_code == 200, response.text
+
+    despues = {
+        rec['producto_id']: rec['score']
+        for rec in servicio.generar_recomendaciones(cliente_id=cliente.id, limit=4)
+    }
+    assert despues[producto_categoria2.id] > servicio.MIN_SCORE
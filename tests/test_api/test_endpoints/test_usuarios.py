@@ -1,44 +1,103 @@
-import pytest
-from fastapi.testclient import TestClient
-from app.main import app  # Asegúrar de importar tu aplicación FastAPI
-from app.db.session import get_db
-from app.models.usuario import Usuario as UsuarioModel
-from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
-
-client = TestClient(app)
-
-@pytest.fixture(scope="module")
-def test_db():
-    # Aquí se debe crear una base de datos de prueba y configurarla
-    yield  # Esto ejecuta las pruebas
-    # Aquí se debe limpiar la base de datos de prueba
-
-def test_create_usuario(test_db):
-    response = client.post("/usuarios/", json={
-        "username": "testuser",
-        "email": "testuser@example.com",
-        "password": "securepassword",
-        "rol": "user"
-    })
-    assert response.status_code == 200
-    assert response.json()["username"] == "testuser"
-
-def test_read_usuarios(test_db):
-    response = client.get("/usuarios/")
-    assert response.status_code == 200
-    assert isinstance(response.json(), list)
-
-def test_read_usuario(test_db):
-    response = client.get("/usuarios/1")  # Asegúrar de que el ID 1 exista
-    assert response.status_code == 200
-    assert response.json()["username"] == "testuser"
-
-def test_update_usuario(test_db):
-    response = client.put("/usuarios/1", json={"username": "updateduser"})
-    assert response.status_code == 200
-    assert response.json()["username"] == "updateduser"
-
-def test_delete_usuario(test_db):
-    response = client.delete("/usuarios/1")  # Asegúrar de que el ID 1 exista
-    assert response.status_code == 200
-    assert response.json()["username"] == "updateduser"  # Compruebar el usuario eliminado
+import pytest
+from app.main import app  # Asegúrar de importar tu aplicación FastAPI
+from app.db.session import get_db
+from app.core.auth import get_cached_user
+from app.models.usuario import Usuario as UsuarioModel
+from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
+
+@pytest.fixture(scope="module")
+def test_db():
+    # Aquí se debe crear una base de datos de prueba y configurarla
+    yield  # Esto ejecuta las pruebas
+    # Aquí se debe limpiar la base de datos de prueba
+
+def test_create_usuario(test_db, app_client):
+    response = app_client.post("/usuarios/", json={
+        "username": "testuser",
+        "email": "testuser@example.com",
+        "password": "securepassword",
+        "rol": "user"
+    })
+    assert response.status_code == 200
+    assert response.json()["username"] == "testuser"
+
+def test_read_usuarios(test_db, app_client):
+    response = app_client.get("/usuarios/")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+def test_read_usuario(test_db, app_client):
+    response = app_client.get("/usuarios/1")  # Asegúrar de que el ID 1 exista
+    assert response.status_code == 200
+    assert response.json()["username"] == "testuser"
+
+def test_update_usuario(test_db, app_client):
+    response = app_client.put("/usuarios/1", json={"username": "updateduser"})
+    assert response.status_code == 200
+    assert response.json()["username"] == "updateduser"
+
+def test_delete_usuario(test_db, app_client):
+    response = app_client.delete("/usuarios/1")  # Asegúrar de que el ID 1 exista
+    assert response.status_code == 200
+    assert response.json()["username"] == "updateduser"  # Compruebar el usuario eliminado
+
+def test_update_usuario_invalida_cache(client, db_session, hashed_test_password):
+    usuario = UsuarioModel(
+        username="cacheuser",
+        email="cacheuser@example.com",
+        password=hashed_test_password,
+        rol="usuario"
+    )
+    db_session.add(usuario)
+    db_session.commit()
+    # Cachear el usuario antes de modificarlo
+    assert get_cached_user(db_session, "cacheuser").activo is True
+
+    response = client.put(f"/usuarios/{usuario.id}", json={"activo": False})
+    assert response.status_code == 200
+    assert get_cached_user(db_session, "cacheuser").activo is False
+
+def test_update_username_invalida_ambos_nombres(client, db_session, hashed_test_password):
+    usuario = UsuarioModel(
+        username="oldname",
+        email="oldname@example.com",
+        password=hashed_test_password,
+        rol="usuario"
+    )
+    db_session.add(usuario)
+    db_session.commit()
+    assert get_cached_user(db_session, "oldname") is not None
+
+    response = client.put(f"/usuarios/{usuario.id}", json={"username": "newname", "rol": "admin"})
+    assert response.status_code == 200
+    assert get_cached_user(db_session, "oldname") is None
+    assert get_cached_user(db_session, "newname").rol == "admin"
+
+def test_delete_usuario_invalida_cache(client, db_session, hashed_test_password):
+    usuario = UsuarioModel(
+        username="deletedcache",
+        email="deletedcache@example.com",
+        password=hashed_test_password,
+        rol="usuario"
+    )
+    db_session.add(usuario)
+    db_session.commit()
+    assert get_cached_user(db_session, "deletedcache") is not None
+
+    response = client.delete(f"/usuarios/{usuario.id}")
+    assert response.status_code == 200
+    assert get_cached_user(db_session, "deletedcache") is None
+
+def test_update_usuario_normaliza_email(client, db_session, hashed_test_password):
+    usuario = UsuarioModel(
+        username="mixedemail",
+        email="mixedemail@example.com",
+        password=hashed_test_password,
+        rol="usuario"
+    )
+    db_session.add(usuario)
+    db_session.commit()
+
+    response = client.put(f"/usuarios/{usuario.id}", json={"email": "Mixed.Email@Example.com"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "mixed.email@example.com"
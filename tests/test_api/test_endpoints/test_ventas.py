@@ -0,0 +1,135 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.cliente import Cliente
+from app.models.producto import Producto
+from app.models.venta import Venta
+from app.models.detalle_venta import DetalleVenta
+
+@pytest.fixture
+def datos_venta(db_session: Session):
+    """
+    Fixture que crea un cliente y dos productos con stock conocido.
+    """
+    cliente = Cliente(nombre="Cliente Ventas", email="ventas@example.com", telefono="1234567890")
+    productos = [
+        Producto(nombre="Producto A", precio=10.0, stock=10, categoria="categoria1", ventas_ultimo_mes=0),
+        Producto(nombre="Producto B", precio=20.0, stock=5, categoria="categoria2", ventas_ultimo_mes=0),
+    ]
+    db_session.add_all([cliente, *productos])
+    db_session.commit()
+    return {"cliente": cliente, "productos": productos}
+
+def _venta_payload(cliente_id: int, lineas: list) -> dict:
+    """Construye el cuerpo de POST /ventas/ a partir de pares (producto_id, cantidad)."""
+    return {
+        "cliente_id": cliente_id,
+        "total": 100.0,
+        "estado": "completada",
+        "detalles_venta": [
+            {"producto_id": producto_id, "cantidad": cantidad, "precio_unitario": 10.0}
+            for producto_id, cantidad in lineas
+        ]
+    }
+
+def _stock_y_ventas(db_session: Session, producto_id: int) -> tuple:
+    """Lee stock y ventas_ultimo_mes de la base de datos, no del mapa de identidad."""
+    return tuple(db_session.execute(
+        select(Producto.stock, Producto.ventas_ultimo_mes).where(Producto.id == producto_id)
+    ).one())
+
+def _ventas_del_cliente(db_session: Session, cliente_id: int) -> int:
+    """Cuenta las ventas registradas para el cliente."""
+    return db_session.execute(
+        select(func.count()).select_from(Venta).where(Venta.cliente_id == cliente_id)
+    ).scalar()
+
+def test_create_venta_varias_lineas_mismo_producto(client: TestClient, db_session: Session, datos_venta):
+    """
+    Verifica que varias líneas del mismo producto descuentan el stock acumulado.
+    """
+    cliente = datos_venta["cliente"]
+    producto_a, producto_b = datos_venta["productos"]
+
+    response = client.post("/ventas/", json=_venta_payload(
+        cliente.id, [(producto_a.id, 2), (producto_a.id, 3), (producto_b.id, 1)]
+    ))
+
+    assert response.status_code == 200, response.text
+    venta_id = response.json()["id"]
+    assert _stock_y_ventas(db_session, producto_a.id) == (5, 5)
+    assert _stock_y_ventas(db_session, producto_b.id) == (4, 1)
+    detalles = db_session.execute(
+        select(func.count()).select_from(DetalleVenta).where(DetalleVenta.venta_id == venta_id)
+    ).scalar()
+    assert detalles == 3
+
+def test_create_venta_bloquea_productos_for_update(client: TestClient, db_session: Session, datos_venta):
+    """
+    Verifica que los productos de la venta se leen con SELECT ... FOR UPDATE.
+    """
+    connection = db_session.connection()
+    if connection.dialect.name != "postgresql":
+        pytest.skip("FOR UPDATE solo se emite en PostgreSQL")
+
+    sentencias = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(connection, "before_cursor_execute", capturar)
+    try:
+        producto_a = datos_venta["productos"][0]
+        response = client.post("/ventas/", json=_venta_payload(datos_venta["cliente"].id, [(producto_a.id, 1)]))
+    finally:
+        event.remove(connection, "before_cursor_execute", capturar)
+
+    assert response.status_code == 200, response.text
+    assert any("FROM productos" in s and "FOR UPDATE" in s for s in sentencias)
+
+def test_create_venta_stock_insuficiente(client: TestClient, db_session: Session, datos_venta):
+    """
+    Verifica que el stock se agota considerando todas las líneas y que la venta se revierte.
+    """
+    cliente = datos_venta["cliente"]
+    producto_a = datos_venta["productos"][0]
+
+    # Cada línea cabe en el stock (10), pero juntas no
+    response = client.post("/ventas/", json=_venta_payload(cliente.id, [(producto_a.id, 6), (producto_a.id, 6)]))
+
+    assert response.status_code == 400
+    assert "Stock insuficiente" in response.json()["detail"]
+    assert _stock_y_ventas(db_session, producto_a.id) == (10, 0)
+    assert _ventas_del_cliente(db_session, cliente.id) == 0
+
+def test_create_venta_producto_inexistente(client: TestClient, db_session: Session, datos_venta):
+    """
+    Verifica el 404 de un producto inexistente y que la venta ya insertada se revierte.
+    """
+    cliente = datos_venta["cliente"]
+    producto_a = datos_venta["productos"][0]
+
+    response = client.post("/ventas/", json=_venta_payload(cliente.id, [(producto_a.id, 1), (999999, 1)]))
+
+    assert response.status_code == 404
+    assert "Producto 999999 no encontrado" in response.json()["detail"]
+    assert _stock_y_ventas(db_session, producto_a.id) == (10, 0)
+    assert _ventas_del_cliente(db_session, cliente.id) == 0
+
+def test_create_venta_con_transaccion_iniciada(client: TestClient, db_session: Session, datos_venta):
+    """
+    Verifica que la venta se crea aunque la sesión ya tenga una transacción en curso,
+    como ocurre cuando una dependencia consulta antes con la misma sesión.
+    """
+    cliente = datos_venta["cliente"]
+    producto_b = datos_venta["productos"][1]
+    db_session.execute(select(Cliente.id).where(Cliente.id == cliente.id))
+    assert db_session.in_transaction()
+
+    response = client.post("/ventas/", json=_venta_payload(cliente.id, [(producto_b.id, 2)]))
+
+    assert response.status_code == 200, response.text
+    assert _stock_y_ventas(db_session, producto_b.id) == (3, 2)
+    assert _ventas_del_cliente(db_session, cliente.id) == 1
@@ -2,7 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verificar_password
+from app.core.security import verificar_password
 from app.models.usuario import Usuario
 from app.main import app
 
@@ -42,19 +42,20 @@ class TestAuth:
         assert user is not None
         assert verificar_password("testpassword123", user.password)
 
-    def test_register_duplicate_email(self, client: TestClient, db_session: Session):
+    def test_register_duplicate_email(self, client: TestClient, db_session: Session, hashed_test_password: str):
         """
         Prueba el intento de registro con un email duplicado.
         
         Args:
             client (TestClient): Cliente de pruebas de FastAPI
             db_session (Session): Sesión de base de datos para pruebas
+            hashed_test_password (str): Hash precalculado de "testpassword123"
         """
         # Crear usuario inicial
         user = Usuario(
             email="test@example.com",
             username="existinguser",
-            password=get_password_hash("password123"),
+            password=hashed_test_password,
             rol="usuario"
         )
         db_session.add(user)
@@ -93,19 +94,20 @@ class TestAuth:
         )
         assert response.status_code == 422
 
-    def test_login_success(self, client: TestClient, db_session: Session):
+    def test_login_success(self, client: TestClient, db_session: Session, hashed_test_password: str):
         """
         Prueba el login exitoso y la obtención del token JWT.
         
         Args:
             client (TestClient): Cliente de pruebas de FastAPI
             db_session (Session): Sesión de base de datos para pruebas
+            hashed_test_password (str): Hash precalculado de "testpassword123"
         """
         # Crear usuario de prueba
         user = Usuario(
             email="test@example.com",
             username="testuser",
-            password=get_password_hash("testpassword123"),
+            password=hashed_test_password,
             rol="usuario"
         )
         db_session.add(user)
@@ -135,19 +137,20 @@ class TestAuth:
         assert response.status_code == 200
         assert "access_token" in response.json()
 
-    def test_get_current_user(self, client: TestClient, db_session: Session):
+    def test_get_current_user(self, client: TestClient, db_session: Session, hashed_test_password: str):
         """
         Prueba la obtención de información del usuario actual.
         
         Args:
             client (TestClient): Cliente de pruebas de FastAPI
             db_session (Session): Sesión de base de datos para pruebas
+            hashed_test_password (str): Hash precalculado de "testpassword123"
         """
         # Crear usuario y obtener token
         user = Usuario(
             email="test@example.com",
             username="testuser",
-            password=get_password_hash("testpassword123"),
+            password=hashed_test_password,
             rol="usuario"
         )
         db_session.add(user)
@@ -172,17 +175,3 @@ class TestAuth:
         data = response.json()
         assert data["email"] == "test@example.com"
         assert data["username"] == "testuser"
-
-    @pytest.fixture(autouse=True)
-    def setup_and_teardown(self, db_session: Session):
-        """
-        Fixture para configuración y limpieza antes y después de cada prueba.
-        
-        Args:
-            db_session (Session): Sesión de base de datos para pruebas
-        """
-        # Setup - si se necesita alguna configuración inicial
-        yield
-        # Teardown - limpieza después de cada prueba
-        db_session.query(Usuario).delete()
-        db_session.commit()
\ No newline at end of file
@@ -0,0 +1,38 @@
+import re
+from pathlib import Path
+
+from app.db.base import Base
+# Registra todos los modelos en Base.metadata
+from app.models import cliente, detalle_venta, producto, recomendacion, usuario, venta  # noqa: F401
+
+SCRIPT_INDICES = Path(__file__).resolve().parents[2] / "scripts" / "create_indexes.sql"
+
+def _indices_compuestos() -> set:
+    """
+    Índices declarados en __table_args__ (compuestos o funcionales), excluyendo
+    los generados por index=True en una columna.
+    """
+    nombres = set()
+    for tabla in Base.metadata.tables.values():
+        for indice in tabla.indexes:
+            columnas = [c.name for c in indice.columns]
+            es_de_columna = (
+                len(indice.expressions) == 1
+                and len(columnas) == 1
+                and indice.name == f"ix_{tabla.name}_{columnas[0]}"
+            )
+            if not es_de_columna:
+                nombres.add(indice.name)
+    return nombres
+
+def test_script_indices_cubre_los_modelos():
+    """
+    Verifica que scripts/create_indexes.sql crea, de forma concurrente, todos los
+    índices compuestos y funcionales de los modelos.
+    """
+    sql = SCRIPT_INDICES.read_text(encoding="utf-8")
+    en_script = set(re.findall(
+        r"CREATE (?:UNIQUE )?INDEX CONCURRENTLY IF NOT EXISTS (\w+)", sql
+    ))
+
+    assert _indices_compuestos() <= en_script
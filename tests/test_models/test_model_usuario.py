@@ -1,6 +1,6 @@
 import pytest
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from app.models.usuario import Usuario
 
@@ -64,11 +64,15 @@ def test_fecha_registro_por_defecto(db_session: Session):
         password="hashedpassword",
         rol="usuario"
     )
+    # El default se evalúa en el flush: acotarlo entre dos lecturas del reloj
+    # no depende de cuánto tarde el commit
+    antes = datetime.utcnow()
     db_session.add(usuario)
     db_session.commit()
+    despues = datetime.utcnow()
     
     assert usuario.fecha_registro is not None
-    assert (datetime.utcnow() - usuario.fecha_registro) < timedelta(seconds=1)
+    assert antes <= usuario.fecha_registro <= despues
 
 def test_usuario_activo_por_defecto(db_session: Session):
     usuario = Usuario(